@@ -427,7 +427,7 @@ case "$1" in
         case "$2" in
             main)
                 _run_supervisor "主服务" "$MAIN_LOG_FILE" "$MAIN_SUPERVISOR_PID_FILE" \
-                    uv run uvicorn "$APP_MODULE" --host "$HOST" --port "$PORT" --log-level info
+                    uv run uvicorn "$APP_MODULE" --host "$HOST" --port "$PORT" --log-level info --no-access-log
                 ;;
             recording)
                 _run_supervisor "录制服务" "$REC_LOG_FILE" "$REC_SUPERVISOR_PID_FILE" \
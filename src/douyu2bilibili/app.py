@@ -1,21 +1,30 @@
 import os
+import asyncio
+import aiohttp
 import uvicorn
 import logging
 import argparse
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from typing import Optional, List, AsyncGenerator
 from urllib.parse import urlparse
-from functools import partial
 
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Body, Depends, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from sqlalchemy import desc, select
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from sqlalchemy import Integer, bindparam, desc, event, func, insert, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
 
 from . import config
+from .cache import SingleFlight, TTLCache
 from .logging_config import setup_logging
 from .uploader import (
     load_yaml_config,
@@ -26,19 +35,54 @@ from .stream_monitor import StreamStatusMonitor
 from .scheduler import (
     scheduled_video_processing,
     scheduled_upload,
-    scheduled_log_stream_end,
+    scheduled_stream_status_check,
     clean_stale_sessions,
     run_processing_sync,
     run_upload_async,
+    get_pipeline_executor,
+    shutdown_pipeline_executor,
 )
 
 # =================== Database Setup ===================
 
 DATABASE_URL = f"sqlite+aiosqlite:///{config.PROJECT_ROOT}/app_data.db"
+# APScheduler's job store is synchronous: it uses the plain sqlite driver and
+# blocks the event loop briefly on job changes and each wakeup. A file of its
+# own keeps those writes from contending with app_data.db's write lock.
+SCHEDULER_JOBSTORE_URL = f"sqlite:///{config.PROJECT_ROOT}/data/scheduler_jobs.db"
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=config.SQL_ECHO,
+    future=True,
+    # Sized for bursts of concurrent API requests; WAL lets the readers share the file
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_recycle=3600,
+    connect_args={"check_same_thread": False},
+)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply per-connection SQLite tuning.
 
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    WAL lets the read endpoints run alongside the scheduler's writes, and
+    synchronous=NORMAL avoids an fsync on every commit (still durable in WAL mode).
+    busy_timeout makes a writer wait for the lock instead of failing immediately.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
 
-AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -49,17 +93,34 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 async def init_db():
     async with engine.begin() as conn:
         try:
-            await conn.run_sync(Base.metadata.create_all)
-            logger.info("数据库表结构已创建或已存在")
-            # Migrate: add streamer_name column to uploaded_videos if missing
-            await conn.run_sync(_migrate_uploaded_videos_streamer_name)
+            # One sqlite_master read; the DDL below only runs when something is missing
+            rows = (await conn.execute(text(
+                "SELECT type, name FROM sqlite_master WHERE type IN ('table', 'index')"
+            ))).all()
+            existing_tables = {name for type_, name in rows if type_ == "table"}
+            existing_indexes = {name for type_, name in rows if type_ == "index"}
+            model_indexes = {
+                index.name for table in Base.metadata.sorted_tables for index in table.indexes
+            }
+            missing_tables = Base.metadata.tables.keys() - existing_tables
+            if missing_tables:
+                await conn.run_sync(Base.metadata.create_all)
+                logger.info("数据库表结构已创建")
+            if missing_tables or model_indexes - existing_indexes:
+                # Migrate: add streamer_name column to uploaded_videos if missing
+                # (its index is then missing as well)
+                await conn.run_sync(_migrate_uploaded_videos_streamer_name)
+                await conn.run_sync(_create_missing_indexes)
+                logger.info("数据库索引已补齐")
+            else:
+                logger.info("数据库表结构已存在")
         except Exception as e:
             logger.error(f"初始化数据库结构时出错: {e}", exc_info=True)
 
 
 def _migrate_uploaded_videos_streamer_name(conn):
     """Add streamer_name column to uploaded_videos table if it doesn't exist."""
-    from sqlalchemy import text, inspect as sa_inspect
+    from sqlalchemy import inspect as sa_inspect
     inspector = sa_inspect(conn)
     columns = [col["name"] for col in inspector.get_columns("uploaded_videos")]
     if "streamer_name" not in columns:
@@ -67,6 +128,121 @@ def _migrate_uploaded_videos_streamer_name(conn):
         conn.execute(text("CREATE INDEX IF NOT EXISTS ix_uploaded_videos_streamer_name ON uploaded_videos (streamer_name)"))
         logger.info("数据库迁移：已为 uploaded_videos 表添加 streamer_name 列")
 
+
+def _create_missing_indexes(conn):
+    """Create model indexes on tables that predate them.
+
+    create_all() skips tables that already exist, including their indexes.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+# =================== Prepared Queries ===================
+# Built once at import time; endpoints only bind parameters per request, and
+# SQLAlchemy's compiled cache (default query_cache_size=500) reuses the SQL.
+
+# The list endpoints select exactly the response model's fields and return
+# lightweight rows; the response models read them via from_attributes.
+_STREAM_SESSION_COLUMNS = (
+    StreamSession.id,
+    StreamSession.streamer_name,
+    StreamSession.start_time,
+    StreamSession.end_time,
+    StreamSession.created_at,
+)
+_UPLOADED_VIDEO_COLUMNS = (
+    UploadedVideo.id,
+    UploadedVideo.bvid,
+    UploadedVideo.title,
+    UploadedVideo.first_part_filename,
+    UploadedVideo.upload_time,
+    UploadedVideo.created_at,
+)
+
+_STREAM_SESSIONS_QUERY = (
+    select(*_STREAM_SESSION_COLUMNS)
+    .where(StreamSession.streamer_name == bindparam("streamer_name"))
+    .order_by(desc(StreamSession.end_time))
+    .limit(bindparam("limit", type_=Integer))
+)
+
+# Point lookups that only read a field or two select plain columns rather than
+# building ORM instances.
+
+_UPLOAD_STATUS_BY_FILENAME_QUERY = select(UploadedVideo.bvid, UploadedVideo.title).where(
+    UploadedVideo.first_part_filename == bindparam("filename")
+)
+
+_UPLOAD_STATUS_BY_FILENAMES_QUERY = select(
+    UploadedVideo.first_part_filename, UploadedVideo.bvid, UploadedVideo.title
+).where(UploadedVideo.first_part_filename.in_(bindparam("filenames", expanding=True)))
+
+# update_video_bvid loads the target row and any other holder of the BVID together
+_VIDEO_WITH_BVID_HOLDER_QUERY = select(
+    UploadedVideo,
+    select(UploadedVideo.id)
+    .where(UploadedVideo.bvid == bindparam("bvid"), UploadedVideo.id != bindparam("video_id"))
+    .limit(1)
+    .scalar_subquery()
+    .label("other_id"),
+).where(UploadedVideo.id == bindparam("video_id"))
+
+# get_latest_bvid in one round-trip: how many sessions the streamer has (capped
+# at the 2 it needs) alongside the most recent upload's BVID and title
+_LATEST_BVID_QUERY = select(
+    select(func.count())
+    .select_from(
+        select(StreamSession.id)
+        .where(StreamSession.streamer_name == bindparam("streamer_name"))
+        .limit(2)
+        .subquery()
+    )
+    .scalar_subquery()
+    .label("session_count"),
+    select(UploadedVideo.bvid)
+    .order_by(desc(UploadedVideo.created_at))
+    .limit(1)
+    .scalar_subquery()
+    .label("bvid"),
+    select(UploadedVideo.title)
+    .order_by(desc(UploadedVideo.created_at))
+    .limit(1)
+    .scalar_subquery()
+    .label("title"),
+)
+
+# SQLite treats "bvid IS NULL" as a one-row lookup on bvid's UNIQUE index and
+# then sorts every match, with or without ANALYZE statistics. INDEXED BY pins
+# the (bvid, upload_time DESC) index, which yields the rows already in order.
+# SQLAlchemy's SQLite dialect does not render table hints, hence text().
+_VIDEOS_WITHOUT_BVID_SQL = (
+    "SELECT id, bvid, title, first_part_filename, upload_time, created_at "
+    "FROM uploaded_videos INDEXED BY ix_uploaded_videos_bvid_upload_time "
+    "WHERE bvid IS NULL ORDER BY upload_time DESC"
+)
+
+_VIDEOS_WITHOUT_BVID_QUERY = text(_VIDEOS_WITHOUT_BVID_SQL).columns(*_UPLOADED_VIDEO_COLUMNS)
+
+_VIDEOS_WITHOUT_BVID_PAGE_QUERY = text(
+    _VIDEOS_WITHOUT_BVID_SQL + " LIMIT :limit OFFSET :offset"
+).columns(*_UPLOADED_VIDEO_COLUMNS)
+
+# =================== Read Caches ===================
+# The uploader polls these point lookups repeatedly; the write endpoints below
+# invalidate the affected entries, and the TTL bounds staleness from writes that
+# bypass the API (e.g. the upload pipeline writing rows directly). Each worker
+# has its own caches, so config disables them when running several workers.
+
+_uploaded_cache = TTLCache(maxsize=1024, ttl=config.API_CACHE_TTL_SECONDS)
+_latest_bvid_cache = TTLCache(maxsize=1024, ttl=config.API_CACHE_TTL_SECONDS)
+# Keyed by (limit, offset); cleared whenever an upload record is written
+_videos_without_bvid_cache = TTLCache(maxsize=64, ttl=config.API_CACHE_TTL_SECONDS)
+
+# On a cache miss, concurrent requests for the same key share one query
+_uploaded_flights = SingleFlight()
+_latest_bvid_flights = SingleFlight()
+
 # =================== Pydantic Models ===================
 
 
@@ -82,8 +258,7 @@ class StreamSessionResponse(BaseModel):
     end_time: Optional[datetime] = None
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UploadedVideoResponse(BaseModel):
     id: int
@@ -93,8 +268,7 @@ class UploadedVideoResponse(BaseModel):
     upload_time: Optional[datetime] = None
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class TaskResponse(BaseModel):
     message: str
@@ -103,95 +277,167 @@ class StreamStartRequest(BaseModel):
     streamer_name: str
     start_time: Optional[datetime] = None
 
+class BvidUpdate(BaseModel):
+    id: int
+    bvid: str
+
+
+# The list endpoints encode their rows with these adapters and return the bytes
+# directly; response_model stays on the routes for the OpenAPI schema only.
+_STREAM_SESSION_LIST = TypeAdapter(List[StreamSessionResponse])
+_UPLOADED_VIDEO_LIST = TypeAdapter(List[UploadedVideoResponse])
+
+
+def _encode_rows(adapter: TypeAdapter, rows) -> bytes:
+    """Validate result rows and encode them to JSON in a single pydantic-core pass."""
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
 # =================== FastAPI App ===================
 
 logger = logging.getLogger("monitor.app")
 
-app = FastAPI(
-    title="视频处理 API",
-    description="提供主播下播记录、视频处理和上传功能",
-    version="0.2.0"
+# --- Scheduler and Monitors ---
+# Jobs persist in data/scheduler_jobs.db, so a restart keeps their schedule
+# instead of re-running everything immediately
+scheduler = AsyncIOScheduler(
+    jobstores={"default": SQLAlchemyJobStore(url=SCHEDULER_JOBSTORE_URL)},
+    job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 120},
 )
+stream_monitors: dict[str, StreamStatusMonitor] = {}
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Held open for the lifetime of the worker that owns the scheduler
+_scheduler_lock_file = None
+_SCHEDULER_LOCK_PATH = os.path.join(config.PROJECT_ROOT, "data", "scheduler.lock")
 
-# --- Scheduler and Monitors ---
-scheduler = AsyncIOScheduler()
-stream_monitors: dict[str, StreamStatusMonitor] = {}
+
+def _acquire_scheduler_role() -> bool:
+    """Decide whether this worker process should run the scheduled jobs.
+
+    With several uvicorn workers every process runs the startup hook, but the
+    pipeline/upload/status jobs must only run once. RUN_SCHEDULER=0 disables
+    the scheduler outright; otherwise the first worker to take an exclusive
+    lock on data/scheduler.lock wins.
+    """
+    global _scheduler_lock_file
+    if os.environ.get("RUN_SCHEDULER", "1") != "1":
+        return False
+    if _scheduler_lock_file is not None:
+        return True
+
+    import fcntl
+
+    lock_file = open(_SCHEDULER_LOCK_PATH, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _scheduler_lock_file = lock_file
+    return True
+
+
+async def _live_streamer_names() -> list[str]:
+    """Names of the streamers that are live right now.
+
+    Only the worker that owns the scheduler keeps monitor status current (through
+    the status-check job); any other worker asks Douyu on each call, falling back
+    to its cached status if the API call fails.
+    """
+    if _scheduler_lock_file is not None:
+        return [name for name, m in stream_monitors.items() if m.is_live()]
+
+    names = list(stream_monitors)
+    statuses = await asyncio.gather(*(stream_monitors[name].check_is_streaming() for name in names))
+    return [
+        name for name, live in zip(names, statuses)
+        if live or (live is None and stream_monitors[name].is_live())
+    ]
 
 # =================== Startup / Shutdown ===================
 
 
-@app.on_event("startup")
-async def startup_event():
-    setup_logging()
-    logger.info("正在初始化数据库...")
-    await init_db()
-    logger.info("数据库初始化完成")
+async def _init_monitor(streamer_cfg: dict, http_session: aiohttp.ClientSession) -> None:
+    """Create a streamer's monitor, fetch its initial status and register it."""
+    name = streamer_cfg["name"]
+    room_id = streamer_cfg["room_id"]
+    monitor = StreamStatusMonitor(room_id, name, session=http_session)
+    await monitor.initialize()
+    stream_monitors[name] = monitor
+    logger.info(f"已初始化主播 {name} (房间号: {room_id}) 的状态监控")
 
-    logger.info("正在加载 YAML 配置...")
-    if not load_yaml_config():
-        logger.error("无法加载或验证配置文件 config.yaml，部分 API 和定时任务可能无法正常工作")
-    else:
-        logger.info("YAML 配置加载完成")
 
-    # Initialize stream monitors from config
-    for streamer_cfg in config.STREAMERS:
-        name = streamer_cfg["name"]
-        room_id = streamer_cfg["room_id"]
-        monitor = StreamStatusMonitor(room_id, name)
-        await monitor.initialize()
-        stream_monitors[name] = monitor
-        logger.info(f"已初始化主播 {name} (房间号: {room_id}) 的状态监控")
+def _ensure_interval_job(func, job_id: str, minutes: float, run_now: bool = False, **job_options) -> None:
+    """Register an interval job unless the persistent job store already has it.
 
+    A persisted job keeps its next run time across restarts; it is only
+    rescheduled when the configured interval has changed.
+    """
+    trigger = IntervalTrigger(minutes=minutes)
+    job = scheduler.get_job(job_id)
+    if job is None:
+        if run_now:
+            job_options["next_run_time"] = local_now()
+        scheduler.add_job(func, trigger, id=job_id, **job_options)
+        return
+
+    scheduler.modify_job(job_id, **job_options)
+    if job.trigger.interval != trigger.interval:
+        scheduler.reschedule_job(job_id, trigger=trigger)
+        logger.info(f"定时任务调度器：任务 '{job_id}' 的执行间隔已变更为 {minutes} 分钟")
+
+
+def _start_scheduler() -> None:
     logger.info("正在启动定时任务调度器...")
     try:
+        # Start paused so the persisted jobs are loaded before they are reconciled
+        scheduler.start(paused=True)
+
         processing_interval = config.SCHEDULE_INTERVAL_MINUTES
         upload_interval = config.UPLOAD_INTERVAL_MINUTES
-        scheduler.add_job(
+        _ensure_interval_job(
             scheduled_video_processing,
-            'interval',
+            'video_processing_job',
             minutes=processing_interval,
-            id='video_processing_job',
-            replace_existing=True,
-            next_run_time=local_now()
+            run_now=True,
+            max_instances=1,
+            coalesce=True,
+            # A run missed while the app was down still happens once (coalesced)
+            # on restart, as long as the next one is not already due
+            misfire_grace_time=processing_interval * 60
         )
-        scheduler.add_job(
+        _ensure_interval_job(
             scheduled_upload,
-            'interval',
+            'upload_job',
             minutes=upload_interval,
-            id='upload_job',
-            replace_existing=True,
-            next_run_time=local_now()
+            run_now=True,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=upload_interval * 60
         )
 
-        for name, monitor in stream_monitors.items():
-            scheduler.add_job(
-                partial(scheduled_log_stream_end, name),
-                'interval',
+        if stream_monitors:
+            _ensure_interval_job(
+                scheduled_stream_status_check,
+                'stream_status_check_job',
                 minutes=config.STREAM_STATUS_CHECK_INTERVAL,
-                id=f'log_stream_end_{name}',
-                replace_existing=True
+                max_instances=1,
+                coalesce=True,
+                misfire_grace_time=30
             )
-            logger.info(f"定时任务调度器：已添加主播 {name} 的状态检测任务，每 {config.STREAM_STATUS_CHECK_INTERVAL} 分钟执行一次")
-
-        if stream_monitors:
-            scheduler.add_job(
-                clean_stale_sessions,
-                'interval',
-                hours=12,
-                id='clean_stale_sessions_job',
-                replace_existing=True
+            logger.info(
+                f"定时任务调度器：已添加主播 {', '.join(stream_monitors)} 的状态检测任务，"
+                f"每 {config.STREAM_STATUS_CHECK_INTERVAL} 分钟执行一次"
             )
+
+            _ensure_interval_job(clean_stale_sessions, 'clean_stale_sessions_job', minutes=12 * 60)
             logger.info("定时任务调度器：已添加 'clean_stale_sessions_job'，每12小时执行一次")
+        else:
+            # No streamers configured any more: drop their persisted jobs
+            for job_id in ('stream_status_check_job', 'clean_stale_sessions_job'):
+                if scheduler.get_job(job_id) is not None:
+                    scheduler.remove_job(job_id)
 
-        scheduler.start()
+        scheduler.resume()
         logger.info(
             f"定时任务调度器已启动，视频处理每 {processing_interval} 分钟，"
             f"上传每 {upload_interval} 分钟"
@@ -200,14 +446,74 @@ async def startup_event():
         logger.error(f"启动定时任务调度器失败: {e}", exc_info=True)
 
 
-@app.on_event("shutdown")
-async def shutdown_event():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    # Explicitly sized default executor for asyncio.to_thread (biliup uploads) and
+    # DNS lookups; the processing pipeline has its own executor
+    default_executor = ThreadPoolExecutor(
+        max_workers=config.THREAD_POOL_SIZE, thread_name_prefix="vp"
+    )
+    asyncio.get_running_loop().set_default_executor(default_executor)
+
+    # Schema setup and the YAML parse are independent; run them side by side
+    logger.info("正在初始化数据库并加载 YAML 配置...")
+    _, yaml_loaded = await asyncio.gather(init_db(), asyncio.to_thread(load_yaml_config))
+    logger.info("数据库初始化完成")
+
+    if not yaml_loaded:
+        logger.error("无法加载或验证配置文件 config.yaml，部分 API 和定时任务可能无法正常工作")
+    else:
+        logger.info("YAML 配置加载完成")
+
+    # One keep-alive HTTP session for all status polls, instead of one per request
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(total=10),
+    )
+
+    # Initial status checks are independent network calls, run them concurrently
+    await asyncio.gather(
+        *(_init_monitor(streamer_cfg, app.state.http) for streamer_cfg in config.STREAMERS)
+    )
+
+    if _acquire_scheduler_role():
+        _start_scheduler()
+    else:
+        logger.info(f"当前 worker (PID: {os.getpid()}) 不负责定时任务，跳过调度器启动")
+
+    yield
+
     logger.info("正在关闭定时任务调度器...")
     if scheduler.running:
         scheduler.shutdown()
         logger.info("定时任务调度器已关闭。")
     else:
         logger.info("定时任务调度器未运行。")
+    shutdown_pipeline_executor()
+    await app.state.http.close()
+    default_executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(
+    title="视频处理 API",
+    description="提供主播下播记录、视频处理和上传功能",
+    version="0.2.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
+
+if config.CORS_ALLOW_ORIGINS:
+    # Explicit lists plus max_age let browsers cache the preflight for a day
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=config.CORS_ALLOW_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT"],
+        allow_headers=["Content-Type", "Authorization"],
+        max_age=86400,
+    )
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
 
 # =================== API Endpoints ===================
 
@@ -220,15 +526,16 @@ async def log_stream_end(
     try:
         end_time = request.end_time or local_now()
 
-        new_session = StreamSession(
-            streamer_name=request.streamer_name,
-            start_time=request.start_time,
-            end_time=end_time
+        # INSERT ... RETURNING hands back the stored row, no refresh round-trip needed
+        result = await db.execute(
+            insert(StreamSession)
+            .values(streamer_name=request.streamer_name, start_time=request.start_time, end_time=end_time)
+            .returning(StreamSession)
         )
-
-        db.add(new_session)
+        new_session = result.scalar_one()
         await db.commit()
-        await db.refresh(new_session)
+
+        _latest_bvid_cache.pop(request.streamer_name)
 
         logger.info(f"已手动记录主播 {request.streamer_name} 的直播会话 (上播: {request.start_time}, 下播: {end_time})")
         return new_session
@@ -244,18 +551,15 @@ async def get_stream_sessions(
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        query = select(StreamSession).filter(
-            StreamSession.streamer_name == streamer_name
-        ).order_by(desc(StreamSession.end_time)).limit(limit)
-
-        result = await db.execute(query)
-        sessions = result.scalars().all()
+        result = await db.execute(
+            _STREAM_SESSIONS_QUERY, {"streamer_name": streamer_name, "limit": limit}
+        )
+        sessions = result.all()
 
         if not sessions:
             logger.warning(f"未找到主播 {streamer_name} 的下播记录")
-            return []
 
-        return sessions
+        return Response(_encode_rows(_STREAM_SESSION_LIST, sessions), media_type="application/json")
     except Exception as e:
         logger.error(f"获取下播记录时出错: {e}")
         raise HTTPException(status_code=500, detail=f"获取下播记录失败: {str(e)}")
@@ -269,48 +573,45 @@ async def record_upload(
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        if bvid:
-            query = select(UploadedVideo).filter(UploadedVideo.bvid == bvid)
-            result = await db.execute(query)
-            existing = result.scalars().first()
-
-            if existing:
-                logger.warning(f"尝试记录已存在的视频 BVID: {bvid}")
-                raise HTTPException(status_code=400, detail=f"视频 BVID {bvid} 已存在")
-
-        query = select(UploadedVideo).filter(UploadedVideo.first_part_filename == first_part_filename)
-        result = await db.execute(query)
-        file_exists = result.scalars().first()
-
-        if file_exists:
-            if bvid and not file_exists.bvid:
-                file_exists.bvid = bvid
-                await db.commit()
-                await db.refresh(file_exists)
-                logger.info(f"已更新视频记录的BVID: {title} (BVID: {bvid})")
-                return file_exists
-
-            logger.warning(f"尝试记录已存在的文件: {first_part_filename}")
-            raise HTTPException(status_code=400, detail=f"文件 {first_part_filename} 已存在记录")
-
         upload_time = get_timestamp_from_filename(first_part_filename)
 
-        new_upload = UploadedVideo(
+        # Insert the record, or attach the BVID to an existing record for the same
+        # file that has none yet; the unique constraints do the duplicate checks
+        stmt = sqlite_insert(UploadedVideo).values(
             bvid=bvid,
             title=title,
             first_part_filename=first_part_filename,
             upload_time=upload_time
         )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UploadedVideo.first_part_filename],
+            set_={"bvid": stmt.excluded.bvid},
+            where=UploadedVideo.bvid.is_(None) & stmt.excluded.bvid.is_not(None)
+        ).returning(UploadedVideo)
+
+        try:
+            result = await db.execute(stmt)
+        except IntegrityError:
+            await db.rollback()
+            logger.warning(f"尝试记录已存在的视频 BVID: {bvid}")
+            raise HTTPException(status_code=400, detail=f"视频 BVID {bvid} 已存在")
+
+        video = result.scalar_one_or_none()
+        if video is None:
+            await db.rollback()
+            logger.warning(f"尝试记录已存在的文件: {first_part_filename}")
+            raise HTTPException(status_code=400, detail=f"文件 {first_part_filename} 已存在记录")
 
-        db.add(new_upload)
         await db.commit()
-        await db.refresh(new_upload)
+        _uploaded_cache.pop(first_part_filename)
+        _latest_bvid_cache.clear()
+        _videos_without_bvid_cache.clear()
 
         if bvid:
-            logger.info(f"已记录视频上传: {title} (BVID: {bvid}, 视频时间: {upload_time})")
+            logger.info(f"已记录视频上传: {title} (BVID: {bvid}, 视频时间: {video.upload_time})")
         else:
-            logger.info(f"已记录视频上传: {title} (暂无BVID, 视频时间: {upload_time})")
-        return new_upload
+            logger.info(f"已记录视频上传: {title} (暂无BVID, 视频时间: {video.upload_time})")
+        return video
     except HTTPException:
         raise
     except Exception as e:
@@ -323,51 +624,102 @@ async def check_uploaded(
     filename: str,
     db: AsyncSession = Depends(get_db)
 ):
+    cached = _uploaded_cache.get(filename)
+    if cached is not None:
+        return cached
+
+    return await _uploaded_flights.do(filename, lambda: _lookup_uploaded(db, filename))
+
+
+async def _lookup_uploaded(db: AsyncSession, filename: str) -> dict:
     try:
-        query = select(UploadedVideo).filter(
-            UploadedVideo.first_part_filename == filename
-        )
-        result = await db.execute(query)
-        existing = result.scalars().first()
+        result = await db.execute(_UPLOAD_STATUS_BY_FILENAME_QUERY, {"filename": filename})
+        existing = result.first()
 
         if existing:
-            return {"uploaded": True, "bvid": existing.bvid, "title": existing.title}
+            response = {"uploaded": True, "bvid": existing.bvid, "title": existing.title}
         else:
-            return {"uploaded": False}
+            response = {"uploaded": False}
+        _uploaded_cache.set(filename, response)
+        return response
     except Exception as e:
         logger.error(f"检查文件 {filename} 是否已上传时出错: {e}")
         raise HTTPException(status_code=500, detail=f"检查文件上传状态失败: {str(e)}")
 
 
+# Keeps the IN (...) lookup well below SQLite's bound-variable limit
+_CHECK_UPLOADED_BATCH_MAX = 500
+
+
+@app.post("/check_uploaded_batch")
+async def check_uploaded_batch(
+    filenames: List[str] = Body(..., max_length=_CHECK_UPLOADED_BATCH_MAX),
+    db: AsyncSession = Depends(get_db)
+):
+    """Upload status for many files at once, keyed by filename.
+
+    Cached entries are answered directly; the rest are looked up in one query.
+    """
+    statuses = {}
+    missing = []
+    for filename in dict.fromkeys(filenames):
+        cached = _uploaded_cache.get(filename)
+        if cached is not None:
+            statuses[filename] = cached
+        else:
+            missing.append(filename)
+
+    if not missing:
+        return statuses
+
+    try:
+        result = await db.execute(_UPLOAD_STATUS_BY_FILENAMES_QUERY, {"filenames": missing})
+        found = {row.first_part_filename: row for row in result}
+        for filename in missing:
+            row = found.get(filename)
+            if row is not None:
+                response = {"uploaded": True, "bvid": row.bvid, "title": row.title}
+            else:
+                response = {"uploaded": False}
+            _uploaded_cache.set(filename, response)
+            statuses[filename] = response
+        return statuses
+    except Exception as e:
+        logger.error(f"批量检查文件是否已上传时出错: {e}")
+        raise HTTPException(status_code=500, detail=f"批量检查文件上传状态失败: {str(e)}")
+
+
 @app.get("/latest_bvid/{streamer_name}")
 async def get_latest_bvid(
     streamer_name: str,
     db: AsyncSession = Depends(get_db)
 ):
-    try:
-        sessions_query = select(StreamSession).filter(
-            StreamSession.streamer_name == streamer_name
-        ).order_by(desc(StreamSession.end_time)).limit(2)
+    cached = _latest_bvid_cache.get(streamer_name)
+    if cached is not None:
+        return cached
 
-        sessions_result = await db.execute(sessions_query)
-        recent_sessions = sessions_result.scalars().all()
+    return await _latest_bvid_flights.do(streamer_name, lambda: _lookup_latest_bvid(db, streamer_name))
 
-        if len(recent_sessions) < 2:
-            logger.warning(f"主播 {streamer_name} 的下播记录不足，无法确定最近的完整直播场次")
-            return {"found": False, "reason": "insufficient_sessions"}
 
-        upload_query = select(UploadedVideo).order_by(desc(UploadedVideo.created_at)).limit(1)
-        upload_result = await db.execute(upload_query)
-        latest_upload = upload_result.scalars().first()
+async def _lookup_latest_bvid(db: AsyncSession, streamer_name: str) -> dict:
+    try:
+        result = await db.execute(_LATEST_BVID_QUERY, {"streamer_name": streamer_name})
+        latest = result.one()
 
-        if latest_upload and latest_upload.bvid:
-            return {
+        if latest.session_count < 2:
+            logger.warning(f"主播 {streamer_name} 的下播记录不足，无法确定最近的完整直播场次")
+            response = {"found": False, "reason": "insufficient_sessions"}
+        elif latest.bvid:
+            response = {
                 "found": True,
-                "bvid": latest_upload.bvid,
-                "title": latest_upload.title
+                "bvid": latest.bvid,
+                "title": latest.title
             }
         else:
-            return {"found": False, "reason": "no_uploads"}
+            response = {"found": False, "reason": "no_uploads"}
+
+        _latest_bvid_cache.set(streamer_name, response)
+        return response
     except Exception as e:
         logger.error(f"获取最新 BVID 时出错: {e}")
         raise HTTPException(status_code=500, detail=f"获取最新 BVID 失败: {str(e)}")
@@ -375,27 +727,53 @@ async def get_latest_bvid(
 
 @app.get("/videos_without_bvid", response_model=List[UploadedVideoResponse])
 async def get_videos_without_bvid(
+    limit: int = Query(200, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
     db: AsyncSession = Depends(get_db)
 ):
-    try:
-        query = select(UploadedVideo).filter(
-            UploadedVideo.bvid.is_(None)
-        ).order_by(desc(UploadedVideo.upload_time))
+    body = _videos_without_bvid_cache.get((limit, offset))
+    if body is not None:
+        return Response(body, media_type="application/json")
 
-        result = await db.execute(query)
-        videos = result.scalars().all()
+    try:
+        result = await db.execute(
+            _VIDEOS_WITHOUT_BVID_PAGE_QUERY, {"limit": limit, "offset": offset}
+        )
+        videos = result.all()
+        # Cache the encoded page so hits skip serialization as well as the query
+        body = _encode_rows(_UPLOADED_VIDEO_LIST, videos)
+        _videos_without_bvid_cache.set((limit, offset), body)
 
         if not videos:
             logger.info("没有找到缺失BVID的视频记录")
-            return []
-
-        logger.info(f"找到 {len(videos)} 条缺失BVID的视频记录")
-        return videos
+        else:
+            logger.info(f"找到 {len(videos)} 条缺失BVID的视频记录")
+        return Response(body, media_type="application/json")
     except Exception as e:
         logger.error(f"获取缺失BVID的视频记录时出错: {e}")
         raise HTTPException(status_code=500, detail=f"获取缺失BVID的视频记录失败: {str(e)}")
 
 
+@app.get("/videos_without_bvid/stream")
+async def stream_videos_without_bvid():
+    """Export every video missing a BVID as NDJSON, one row at a time.
+
+    Uses its own session because request-scoped dependencies are closed before
+    a streaming body is sent.
+    """
+    async def generate():
+        try:
+            async with AsyncSessionLocal() as db:
+                videos = await db.stream(_VIDEOS_WITHOUT_BVID_QUERY)
+                async for video in videos:
+                    yield UploadedVideoResponse.model_validate(video).model_dump_json() + "\n"
+        except Exception as e:
+            logger.error(f"导出缺失BVID的视频记录时出错: {e}")
+            raise
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @app.put("/update_video_bvid/{video_id}", response_model=UploadedVideoResponse)
 async def update_video_bvid(
     video_id: int,
@@ -406,27 +784,24 @@ async def update_video_bvid(
         if not bvid or not bvid.startswith('BV'):
             raise HTTPException(status_code=400, detail="无效的BVID格式")
 
-        bvid_query = select(UploadedVideo).filter(
-            UploadedVideo.bvid == bvid,
-            UploadedVideo.id != video_id
+        result = await db.execute(
+            _VIDEO_WITH_BVID_HOLDER_QUERY, {"bvid": bvid, "video_id": video_id}
         )
-        bvid_result = await db.execute(bvid_query)
-        bvid_exists = bvid_result.scalars().first()
+        row = result.first()
 
-        if bvid_exists:
-            logger.warning(f"BVID {bvid} 已存在于记录 ID: {bvid_exists.id}")
-            raise HTTPException(status_code=400, detail=f"BVID {bvid} 已存在于其他记录中")
-
-        query = select(UploadedVideo).filter(UploadedVideo.id == video_id)
-        result = await db.execute(query)
-        video = result.scalars().first()
-
-        if not video:
+        if row is None:
             raise HTTPException(status_code=404, detail=f"未找到ID为 {video_id} 的视频记录")
 
+        video, other_id = row
+        if other_id is not None:
+            logger.warning(f"BVID {bvid} 已存在于记录 ID: {other_id}")
+            raise HTTPException(status_code=400, detail=f"BVID {bvid} 已存在于其他记录中")
+
         video.bvid = bvid
         await db.commit()
-        await db.refresh(video)
+        _uploaded_cache.pop(video.first_part_filename)
+        _latest_bvid_cache.clear()
+        _videos_without_bvid_cache.clear()
 
         logger.info(f"已更新视频记录 ID: {video_id} 的BVID为 {bvid}")
         return video
@@ -437,6 +812,57 @@ async def update_video_bvid(
         raise HTTPException(status_code=500, detail=f"更新视频BVID失败: {str(e)}")
 
 
+@app.put("/update_video_bvids_bulk", response_model=List[UploadedVideoResponse])
+async def update_video_bvids_bulk(
+    updates: List[BvidUpdate],
+    db: AsyncSession = Depends(get_db)
+):
+    """Set the BVIDs of several records in one transaction (all or nothing)."""
+    try:
+        if not updates:
+            return []
+        if any(not u.bvid.startswith('BV') for u in updates):
+            raise HTTPException(status_code=400, detail="无效的BVID格式")
+
+        requested = {u.bvid: u.id for u in updates}
+        ids = {u.id for u in updates}
+        if len(requested) != len(updates) or len(ids) != len(updates):
+            raise HTTPException(status_code=400, detail="请求中存在重复的视频ID或BVID")
+
+        # One lookup covers both the target rows and any other holders of the BVIDs
+        result = await db.execute(
+            select(UploadedVideo.id, UploadedVideo.bvid, UploadedVideo.first_part_filename).where(
+                (UploadedVideo.id.in_(ids)) | (UploadedVideo.bvid.in_(requested))
+            )
+        )
+        rows = result.all()
+
+        missing = ids - {row.id for row in rows}
+        if missing:
+            raise HTTPException(status_code=404, detail=f"未找到ID为 {sorted(missing)} 的视频记录")
+        for row in rows:
+            if row.bvid in requested and requested[row.bvid] != row.id:
+                logger.warning(f"BVID {row.bvid} 已存在于记录 ID: {row.id}")
+                raise HTTPException(status_code=400, detail=f"BVID {row.bvid} 已存在于其他记录中")
+
+        await db.execute(update(UploadedVideo), [{"id": u.id, "bvid": u.bvid} for u in updates])
+        await db.commit()
+        for row in rows:
+            if row.id in ids:
+                _uploaded_cache.pop(row.first_part_filename)
+        _latest_bvid_cache.clear()
+        _videos_without_bvid_cache.clear()
+
+        logger.info(f"已批量更新 {len(updates)} 条视频记录的BVID")
+        result = await db.execute(select(*_UPLOADED_VIDEO_COLUMNS).where(UploadedVideo.id.in_(ids)))
+        return result.all()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"批量更新视频BVID时出错: {e}")
+        raise HTTPException(status_code=500, detail=f"批量更新视频BVID失败: {str(e)}")
+
+
 @app.post("/log_stream_start", response_model=StreamSessionResponse)
 async def log_stream_start(
     request: StreamStartRequest,
@@ -445,15 +871,15 @@ async def log_stream_start(
     try:
         start_time = request.start_time or local_now()
 
-        new_session = StreamSession(
-            streamer_name=request.streamer_name,
-            start_time=start_time,
-            end_time=None
+        result = await db.execute(
+            insert(StreamSession)
+            .values(streamer_name=request.streamer_name, start_time=start_time, end_time=None)
+            .returning(StreamSession)
         )
-
-        db.add(new_session)
+        new_session = result.scalar_one()
         await db.commit()
-        await db.refresh(new_session)
+
+        _latest_bvid_cache.pop(request.streamer_name)
 
         logger.info(f"已手动记录主播 {request.streamer_name} 的上播时间: {start_time}")
         return new_session
@@ -465,10 +891,10 @@ async def log_stream_start(
 
 
 @app.post("/run_processing_tasks", response_model=TaskResponse)
-async def trigger_processing_tasks(background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+async def trigger_processing_tasks():
     """Trigger background video processing (cleanup, convert, encode)."""
     if config.PROCESS_AFTER_STREAM_END:
-        live_names = [name for name, m in stream_monitors.items() if m.is_live()]
+        live_names = await _live_streamer_names()
         if live_names:
             msg = f"主播 {', '.join(live_names)} 正在直播中，当前配置为仅下播后处理，无法执行压制任务"
             logger.info(f"手动触发：{msg}")
@@ -477,7 +903,8 @@ async def trigger_processing_tasks(background_tasks: BackgroundTasks, db: AsyncS
 
     is_skip_encoding = config.SKIP_VIDEO_ENCODING
 
-    background_tasks.add_task(run_processing_sync)
+    # Fire and forget: run_processing_sync logs its own errors
+    asyncio.get_running_loop().run_in_executor(get_pipeline_executor(), run_processing_sync)
 
     if is_skip_encoding:
         logger.info("已将视频处理任务添加到后台执行队列 (手动触发，跳过压制步骤)")
@@ -488,13 +915,10 @@ async def trigger_processing_tasks(background_tasks: BackgroundTasks, db: AsyncS
 
 
 @app.post("/run_upload_tasks", response_model=TaskResponse)
-async def trigger_upload_tasks(
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
-):
+async def trigger_upload_tasks(background_tasks: BackgroundTasks):
     """Trigger background BVID update and upload tasks."""
     if config.PROCESS_AFTER_STREAM_END:
-        live_names = [name for name, m in stream_monitors.items() if m.is_live()]
+        live_names = await _live_streamer_names()
         if live_names:
             msg = f"主播 {', '.join(live_names)} 正在直播中，当前配置为仅下播后处理，无法执行上传任务"
             logger.info(f"手动触发：{msg}")
@@ -504,7 +928,7 @@ async def trigger_upload_tasks(
     is_skip_encoding = config.SKIP_VIDEO_ENCODING
     file_type = "FLV" if is_skip_encoding else "MP4"
 
-    background_tasks.add_task(run_upload_async, db)
+    background_tasks.add_task(run_upload_async)
 
     logger.info(f"已将BVID更新和上传任务添加到后台执行队列 (手动触发，将上传{file_type}文件)")
     return {"message": f"BVID更新和上传任务已开始在后台执行 (手动触发，将上传{file_type}文件)"}
@@ -533,17 +957,32 @@ def start_api_server():
         action="store_true",
         help="启用自动重载 (开发模式)"
     )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY", 1)),
+        help="worker 进程数 (默认: 环境变量 WEB_CONCURRENCY 或 1；定时任务只在其中一个 worker 运行)"
+    )
     args = parser.parse_args()
+    # uvicorn cannot combine the reloader with multiple workers
+    workers = 1 if args.reload else max(args.workers, 1)
 
     print(f"启动 API 服务器: http://{args.host}:{args.port}")
     print(f"配置的 API_BASE_URL: {config.API_BASE_URL}")
+    if workers > 1:
+        print(f"worker 进程数: {workers}")
     print("按 Ctrl+C 停止服务器")
 
+    # Spawned workers re-import config, which reads this to size the read caches
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
     uvicorn.run(
         "douyu2bilibili.app:app",
         host=args.host,
         port=args.port,
-        reload=args.reload
+        reload=args.reload,
+        workers=workers,
+        access_log=False,
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+"""Small in-process caching helpers used by the read-heavy API endpoints."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Optional
+
+
+class TTLCache:
+    """Bounded mapping whose entries expire ``ttl`` seconds after being stored.
+
+    When full, the least recently used entry is evicted. A ``ttl`` of 0 or
+    less disables caching. Not thread-safe; it is only touched from the event
+    loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into a single in-flight call.
+
+    Callers arriving while a call for their key is running share its result
+    (or exception) instead of starting their own. If the caller running the
+    call is cancelled, a waiting caller runs it again. Nothing is kept once
+    the call finishes; pair it with TTLCache to reuse results.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        while (future := self._inflight.get(key)) is not None:
+            try:
+                # Shielded so a waiter going away does not cancel the shared call
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only the leading caller was cancelled (e.g. its client went
+                # away): retry instead of failing this waiter along with it
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an error nobody else waited on is not logged again
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                future.cancel()
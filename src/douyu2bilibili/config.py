@@ -129,6 +129,21 @@ PROCESS_AFTER_STREAM_END = False
 API_BASE_URL = "http://localhost:50009"
 # API 服务器是否已启动 (如果为 False，将跳过依赖 API 的功能)
 API_ENABLED = True
+# API worker 进程数 (uvicorn 同样读取环境变量 WEB_CONCURRENCY)
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+# /check_uploaded、/latest_bvid 等只读接口的进程内缓存有效期 (秒)，写接口会主动失效
+# 缓存按进程独立，写接口只能失效本 worker 的缓存，因此多 worker 时禁用 (0)
+API_CACHE_TTL_SECONDS = 30 if WEB_CONCURRENCY <= 1 else 0
+# 是否打印 SQLAlchemy 执行的每条 SQL (仅调试用，会明显拖慢接口)，可通过环境变量 SQL_ECHO=1 开启
+SQL_ECHO = os.environ.get("SQL_ECHO", "0") == "1"
+# 数据库连接池大小与溢出上限 (每个 uvicorn worker 各自一份)
+DB_POOL_SIZE = 20
+DB_MAX_OVERFLOW = 40
+# 事件循环默认线程池大小 (asyncio.to_thread 上传、DNS 解析等使用)，按 uvicorn worker 分别计算；
+# 可通过环境变量 THREAD_POOL_SIZE 覆盖
+THREAD_POOL_SIZE = int(os.environ.get("THREAD_POOL_SIZE", min(32, (os.cpu_count() or 1) + 4)))
+# 允许跨域访问 API 的来源列表；设为空列表表示仅同源访问 (不挂载 CORS 中间件)
+CORS_ALLOW_ORIGINS: list[str] = ["*"]
 
 # --- 主播配置 ---
 # 主播列表 — 启动时由 load_yaml_config() 从 config.yaml 的 streamers 部分自动填充。
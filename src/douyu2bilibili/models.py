@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, desc, select
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, desc, select
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
 from typing import Optional
@@ -23,6 +23,19 @@ class StreamSession(Base):
     end_time = Column(DateTime, nullable=True)    # 下播时间，修改为可为空
     created_at = Column(DateTime, default=local_now)  # 使用本地时区函数
 
+    __table_args__ = (
+        # /stream_sessions、/latest_bvid: WHERE streamer_name = ? ORDER BY end_time DESC
+        Index("ix_stream_sessions_streamer_end", streamer_name, end_time.desc()),
+        # 状态检测/uploader 查找进行中的场次: WHERE streamer_name = ? AND end_time IS NULL
+        # ORDER BY start_time DESC；clean_stale_sessions 同样只扫描未结束场次（部分索引）
+        Index(
+            "ix_stream_sessions_open",
+            streamer_name,
+            start_time.desc(),
+            sqlite_where=end_time.is_(None),
+        ),
+    )
+
     def __repr__(self):
         return f"<StreamSession(streamer='{self.streamer_name}', end_time='{self.end_time}')>"
 
@@ -37,5 +50,14 @@ class UploadedVideo(Base):
     streamer_name = Column(String, nullable=True, index=True)  # 主播名称
     created_at = Column(DateTime, default=local_now)  # 数据库记录创建时间
 
+    __table_args__ = (
+        # /latest_bvid: ORDER BY created_at DESC LIMIT 1
+        Index("ix_uploaded_videos_created_at", created_at.desc()),
+        # /videos_without_bvid: WHERE bvid IS NULL ORDER BY upload_time DESC（查询以 INDEXED BY 指定）
+        Index("ix_uploaded_videos_bvid_upload_time", bvid, upload_time.desc()),
+        # uploader 按直播场次查找已有稿件: WHERE upload_time BETWEEN ? AND ? ORDER BY upload_time DESC
+        Index("ix_uploaded_videos_upload_time", upload_time.desc()),
+    )
+
     def __repr__(self):
         return f"<UploadedVideo(bvid='{self.bvid}', title='{self.title}')>" 
\ No newline at end of file
@@ -1,21 +1,78 @@
+import os
 import time
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from datetime import timedelta
+from typing import Optional
 
-from sqlalchemy import desc, select
+from sqlalchemy import desc, func, select, update
 
 from . import config
 from .danmaku import cleanup_small_files, convert_danmaku
 from .encoder import encode_video
 from .uploader import load_yaml_config, upload_to_bilibili, update_video_bvids
 from .models import StreamSession, local_now
-from sqlalchemy.ext.asyncio import AsyncSession
 
 upload_logger = logging.getLogger("upload.scheduler")
 pipeline_logger = logging.getLogger("pipeline.scheduler")
 monitor_logger = logging.getLogger("monitor.session")
 
+# Dedicated single-worker executor for the sync processing pipeline, shared by
+# scheduled and manual runs: runs queue up instead of overlapping, and never hold
+# a slot in the default executor that Starlette and other to_thread calls use.
+# Created on first use and dropped on app shutdown, so a later lifespan in the
+# same process (e.g. consecutive TestClient blocks) gets a fresh one.
+_pipeline_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_pipeline_executor() -> ThreadPoolExecutor:
+    global _pipeline_executor
+    if _pipeline_executor is None:
+        _pipeline_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline")
+    return _pipeline_executor
+
+
+def shutdown_pipeline_executor() -> None:
+    """Cancel queued pipeline runs and release the executor."""
+    global _pipeline_executor
+    if _pipeline_executor is not None:
+        _pipeline_executor.shutdown(wait=False, cancel_futures=True)
+        _pipeline_executor = None
+
+
+# Each uvicorn worker has its own pipeline executor; this lock keeps a manual run
+# in one worker from overlapping a run in another on the same files
+_PIPELINE_LOCK_PATH = os.path.join(config.PROJECT_ROOT, "data", "pipeline.lock")
+
+
+@contextmanager
+def _pipeline_file_lock():
+    """Hold an exclusive lock on data/pipeline.lock, waiting for other processes."""
+    import fcntl
+
+    with open(_PIPELINE_LOCK_PATH, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield  # closing the file releases the lock
+
+
+def _run_pipeline_steps(prefix: str, skip_encoding: bool) -> None:
+    """Cleanup, danmaku conversion and encoding, as one cross-process-exclusive run."""
+    with _pipeline_file_lock():
+        pipeline_logger.info(f"{prefix}：执行文件清理...")
+        cleanup_small_files()
+
+        if not skip_encoding:
+            pipeline_logger.info(f"{prefix}：执行弹幕转换...")
+            convert_danmaku()
+        else:
+            pipeline_logger.info(f"{prefix}：已配置跳过压制，不执行弹幕转换")
+
+        pipeline_logger.info(f"{prefix}：处理视频文件...")
+        encode_video()
+
 
 def _get_app_deps():
     """Late import to avoid circular dependency with app module.
@@ -32,7 +89,7 @@ async def scheduled_video_processing():
 
     pipeline_logger.info("定时任务：开始执行视频处理流程...")
     loop = asyncio.get_running_loop()
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     # Check if "process only after stream ends" is enabled
     if config.PROCESS_AFTER_STREAM_END:
@@ -52,18 +109,9 @@ async def scheduled_video_processing():
         pipeline_logger.info("定时任务：检测到 SKIP_VIDEO_ENCODING=True 配置，将跳过弹幕压制步骤，直接处理 FLV 文件")
 
     try:
-        pipeline_logger.info("定时任务：执行文件清理...")
-        await loop.run_in_executor(None, cleanup_small_files)
-
-        if not is_skip_encoding:
-            pipeline_logger.info("定时任务：执行弹幕转换...")
-            await loop.run_in_executor(None, convert_danmaku)
-        else:
-            pipeline_logger.info("定时任务：已配置跳过压制，不执行弹幕转换")
-
-        pipeline_logger.info("定时任务：处理视频文件...")
-        await loop.run_in_executor(None, encode_video)
-
+        await loop.run_in_executor(
+            get_pipeline_executor(), partial(_run_pipeline_steps, "定时任务", is_skip_encoding)
+        )
         pipeline_logger.info("定时任务：视频处理任务完成。")
     except asyncio.CancelledError:
         pipeline_logger.info("定时任务：视频处理任务在应用关闭过程中被取消")
@@ -71,8 +119,8 @@ async def scheduled_video_processing():
     except Exception as e:
         pipeline_logger.error(f"定时任务：视频处理任务执行过程中出错: {e}", exc_info=True)
 
-    end_time = time.time()
-    pipeline_logger.info(f"定时任务：视频处理流程执行完毕。耗时: {end_time - start_time:.2f} 秒。")
+    elapsed = time.perf_counter() - start_time
+    pipeline_logger.info(f"定时任务：视频处理流程执行完毕。耗时: {elapsed:.2f} 秒。")
 
 
 async def scheduled_upload():
@@ -84,28 +132,28 @@ async def scheduled_upload():
         return
 
     upload_logger.info("定时任务：开始执行上传流程...")
-    start_time = time.time()
+    start_time = time.perf_counter()
 
-    async with AsyncSessionLocal() as db:
-        try:
-            if not load_yaml_config():
-                upload_logger.error("定时任务：无法加载 YAML 配置，跳过上传任务。")
-                return
-            upload_logger.info("定时任务：执行 BVID 更新...")
+    try:
+        if not load_yaml_config():
+            upload_logger.error("定时任务：无法加载 YAML 配置，跳过上传任务。")
+            return
+        # One session per step, so the BVID pass's connection is not held for the upload
+        upload_logger.info("定时任务：执行 BVID 更新...")
+        async with AsyncSessionLocal() as db:
             await update_video_bvids(db)
-            upload_logger.info("定时任务：执行视频上传...")
+        upload_logger.info("定时任务：执行视频上传...")
+        async with AsyncSessionLocal() as db:
             await upload_to_bilibili(db)
-            upload_logger.info("定时任务：上传任务完成。")
-        except asyncio.CancelledError:
-            upload_logger.info("定时任务：上传任务在应用关闭过程中被取消")
-            return
-        except Exception as e:
-            upload_logger.error(f"定时任务：上传任务执行过程中出错: {e}", exc_info=True)
-        finally:
-            await db.close()
+        upload_logger.info("定时任务：上传任务完成。")
+    except asyncio.CancelledError:
+        upload_logger.info("定时任务：上传任务在应用关闭过程中被取消")
+        return
+    except Exception as e:
+        upload_logger.error(f"定时任务：上传任务执行过程中出错: {e}", exc_info=True)
 
-    end_time = time.time()
-    upload_logger.info(f"定时任务：上传流程执行完毕。耗时: {end_time - start_time:.2f} 秒。")
+    elapsed = time.perf_counter() - start_time
+    upload_logger.info(f"定时任务：上传流程执行完毕。耗时: {elapsed:.2f} 秒。")
 
 
 async def scheduled_log_stream_end(streamer_name: str):
@@ -129,13 +177,12 @@ async def scheduled_log_stream_end(streamer_name: str):
         if monitor.is_live():
             async with AsyncSessionLocal() as db:
                 try:
-                    query = select(StreamSession).filter(
+                    query = select(StreamSession.id).filter(
                         StreamSession.streamer_name == streamer_name,
                         StreamSession.start_time.is_not(None),
                         StreamSession.end_time.is_(None)
-                    )
-                    result = await db.execute(query)
-                    existing = result.scalars().first()
+                    ).limit(1)
+                    existing = await db.scalar(query)
                     if existing is None:
                         adjusted_start_time = current_time - timedelta(minutes=config.STREAM_START_TIME_ADJUSTMENT)
                         new_session = StreamSession(
@@ -185,10 +232,9 @@ async def scheduled_log_stream_end(streamer_name: str):
                     StreamSession.streamer_name == streamer_name,
                     StreamSession.start_time.is_not(None),
                     StreamSession.end_time.is_(None)
-                ).order_by(desc(StreamSession.start_time))
+                ).order_by(desc(StreamSession.start_time)).limit(1)
 
-                result = await db.execute(query)
-                recent_session = result.scalars().first()
+                recent_session = await db.scalar(query)
 
                 if recent_session:
                     recent_session.end_time = current_time
@@ -208,17 +254,18 @@ async def scheduled_log_stream_end(streamer_name: str):
             # schedule delayed processing, then upload after processing has time to finish
             if not new_status and config.PROCESS_AFTER_STREAM_END:
                 monitor_logger.info("检测到主播下播，且已启用'仅下播后处理'选项，3分钟后触发视频处理，8分钟后触发上传")
+                now = local_now()
                 scheduler.add_job(
                     scheduled_video_processing,
                     'date',
-                    run_date=local_now() + timedelta(minutes=3),
+                    run_date=now + timedelta(minutes=3),
                     id=f'post_stream_processing_{streamer_name}',
                     replace_existing=True
                 )
                 scheduler.add_job(
                     scheduled_upload,
                     'date',
-                    run_date=local_now() + timedelta(minutes=8),
+                    run_date=now + timedelta(minutes=8),
                     id=f'post_stream_upload_{streamer_name}',
                     replace_existing=True
                 )
@@ -228,6 +275,24 @@ async def scheduled_log_stream_end(streamer_name: str):
             await db.rollback()
 
 
+async def scheduled_stream_status_check():
+    """Scheduled task: check every monitored streamer in a single tick.
+
+    Replaces one APScheduler job per streamer; the per-streamer checks run
+    concurrently and a failure in one does not affect the others.
+    """
+    _, _, stream_monitors = _get_app_deps()
+
+    names = list(stream_monitors)
+    results = await asyncio.gather(
+        *(scheduled_log_stream_end(name) for name in names),
+        return_exceptions=True,
+    )
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            monitor_logger.error(f"定时任务(stream_status_check): 检测主播 {name} 状态时出错: {result}")
+
+
 async def clean_stale_sessions():
     """Clean up stale stream sessions that started 24h+ ago but never got an end_time."""
     AsyncSessionLocal, _, _ = _get_app_deps()
@@ -237,29 +302,34 @@ async def clean_stale_sessions():
     try:
         async with AsyncSessionLocal() as db:
             yesterday = local_now() - timedelta(hours=24)
-            query = select(StreamSession).filter(
-                StreamSession.start_time.is_not(None),
-                StreamSession.start_time < yesterday,
-                StreamSession.end_time.is_(None)
+            # start_time is over 24h old, so start_time + 12h is always in the past.
+            # SQLite's datetime() drops the ".ffffff" suffix the ORM stores; re-append it
+            # so end_time keeps the same text format and compares correctly.
+            end_time = func.strftime(
+                "%Y-%m-%d %H:%M:%S", StreamSession.start_time, "+12 hours"
+            ).concat(func.substr(StreamSession.start_time, 20))
+            result = await db.execute(
+                update(StreamSession)
+                .where(
+                    StreamSession.start_time.is_not(None),
+                    StreamSession.start_time < yesterday,
+                    StreamSession.end_time.is_(None)
+                )
+                .values(end_time=end_time)
+                .returning(StreamSession.id, StreamSession.end_time)
+                .execution_options(synchronize_session=False)
             )
+            cleaned = result.all()
 
-            result = await db.execute(query)
-            stale_sessions = result.scalars().all()
-
-            if not stale_sessions:
+            if not cleaned:
                 monitor_logger.info("没有发现长时间未结束的直播会话")
                 return
 
-            for session in stale_sessions:
-                suggested_end_time = session.start_time + timedelta(hours=12)
-                if suggested_end_time > local_now():
-                    suggested_end_time = local_now()
-
-                session.end_time = suggested_end_time
-                monitor_logger.info(f"已清理长时间未结束的会话 ID:{session.id}，设置结束时间为 {suggested_end_time}")
+            for session_id, end_time in cleaned:
+                monitor_logger.info(f"已清理长时间未结束的会话 ID:{session_id}，设置结束时间为 {end_time}")
 
             await db.commit()
-            monitor_logger.info(f"成功清理 {len(stale_sessions)} 个未正常结束的直播会话")
+            monitor_logger.info(f"成功清理 {len(cleaned)} 个未正常结束的直播会话")
 
     except Exception as e:
         monitor_logger.error(f"清理未结束直播会话时出错: {e}", exc_info=True)
@@ -269,33 +339,31 @@ def run_processing_sync():
     """Synchronous video processing for background thread execution."""
     pipeline_logger.info("后台任务：开始执行视频处理（清理、转换、压制）...")
     try:
-        cleanup_small_files()
-
-        is_skip_encoding = config.SKIP_VIDEO_ENCODING
-
-        if not is_skip_encoding:
-            pipeline_logger.info("后台任务：执行弹幕转换...")
-            convert_danmaku()
-        else:
-            pipeline_logger.info("后台任务：已配置跳过压制，不执行弹幕转换")
-
-        pipeline_logger.info("后台任务：处理视频文件...")
-        encode_video()
-
+        _run_pipeline_steps("后台任务", config.SKIP_VIDEO_ENCODING)
         pipeline_logger.info("后台任务：视频处理执行完成")
     except Exception as e:
         pipeline_logger.error(f"后台任务：视频处理执行过程中出错: {e}")
 
 
-async def run_upload_async(db: AsyncSession):
-    """Async upload task for background execution."""
+async def run_upload_async():
+    """Async upload task for background execution.
+
+    Opens its own sessions: the task runs after the triggering request has
+    returned, so it cannot borrow the request-scoped one. As in
+    scheduled_upload, the BVID pass and the upload each get a session, so the
+    first connection is released before the long-running upload starts.
+    """
+    AsyncSessionLocal, _, _ = _get_app_deps()
+
     upload_logger.info("后台任务：开始执行BVID更新和视频上传 (手动触发)...")
     try:
         if not load_yaml_config():
              upload_logger.error("手动触发：无法加载 YAML 配置，跳过异步任务。")
              return
-        await update_video_bvids(db)
-        await upload_to_bilibili(db)
+        async with AsyncSessionLocal() as db:
+            await update_video_bvids(db)
+        async with AsyncSessionLocal() as db:
+            await upload_to_bilibili(db)
         upload_logger.info("后台任务：BVID更新和视频上传执行完成 (手动触发)")
     except Exception as e:
         upload_logger.error(f"后台任务：BVID更新和视频上传执行过程中出错 (手动触发): {e}", exc_info=True)
@@ -19,9 +19,17 @@ _REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
 class StreamStatusMonitor:
     """Monitor a single Douyu streamer's live status via API polling."""
 
-    def __init__(self, room_id: str, streamer_name: str):
+    def __init__(
+        self,
+        room_id: str,
+        streamer_name: str,
+        session: Optional[aiohttp.ClientSession] = None,
+    ):
         self.room_id = room_id
         self.streamer_name = streamer_name
+        # Shared HTTP session (keeps connections alive between polls); when None
+        # each check opens its own short-lived session.
+        self._session = session
         self._last_status: Optional[bool] = None  # None = uninitialized
 
     def is_live(self) -> bool:
@@ -35,22 +43,10 @@ class StreamStatusMonitor:
             True if streaming, False if not, None if API error.
         """
         try:
+            if self._session is not None:
+                return await self._fetch_status(self._session)
             async with aiohttp.ClientSession(timeout=_REQUEST_TIMEOUT) as session:
-                async with session.get(
-                    f"https://www.douyu.com/betard/{self.room_id}",
-                    headers=_DOUYU_HEADERS
-                ) as response:
-                    if response.status != 200:
-                        logger.error(f"[{self.streamer_name}] Failed to get room info: HTTP {response.status}")
-                        return None
-
-                    room_info = await response.json()
-                    if not room_info or 'room' not in room_info:
-                        logger.error(f"[{self.streamer_name}] Invalid room info response format")
-                        return None
-
-                    room_data = room_info['room']
-                    return room_data.get('show_status') == 1 and room_data.get('videoLoop') == 0
+                return await self._fetch_status(session)
 
         except asyncio.TimeoutError:
             # TimeoutError 的 str(e) 通常为空，单独处理避免空白日志。
@@ -66,6 +62,24 @@ class StreamStatusMonitor:
             )
             return None
 
+    async def _fetch_status(self, session: aiohttp.ClientSession) -> Optional[bool]:
+        async with session.get(
+            f"https://www.douyu.com/betard/{self.room_id}",
+            headers=_DOUYU_HEADERS,
+            timeout=_REQUEST_TIMEOUT
+        ) as response:
+            if response.status != 200:
+                logger.error(f"[{self.streamer_name}] Failed to get room info: HTTP {response.status}")
+                return None
+
+            room_info = await response.json()
+            if not room_info or 'room' not in room_info:
+                logger.error(f"[{self.streamer_name}] Invalid room info response format")
+                return None
+
+            room_data = room_info['room']
+            return room_data.get('show_status') == 1 and room_data.get('videoLoop') == 0
+
     async def initialize(self) -> None:
         """Initialize cached status by calling the API directly.
         Called once on application startup.
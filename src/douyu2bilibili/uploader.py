@@ -22,7 +22,8 @@ except Exception:  # pragma: no cover - optional when using biliup CLI backend
 
 # 导入数据库相关模块
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func, and_, or_
+from sqlalchemy import select, desc, func, and_, or_, update
+from sqlalchemy.orm.attributes import set_committed_value
 
 from .models import UploadedVideo, StreamSession # 需要导入模型
 
@@ -34,6 +35,9 @@ yaml_config = {} # 用于存储从 config.yaml 读取的配置
 streamer_configs = {}  # 主播名 -> 上传元数据 dict
 upload_global_config = {}  # 全局上传配置 (max_concurrent 等)
 _upload_semaphore: Optional[asyncio.Semaphore] = None  # 上传并发控制信号量
+_yaml_parse_cache = {}  # config.yaml 解析结果缓存 (按路径、mtime、大小失效)
+# libyaml 加速的 SafeLoader，未编译 libyaml 时回退到纯 Python 实现
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 _BILIUP_BVID_RE = re.compile(r"BV[0-9A-Za-z]{10}")
 _BILIUP_CODE_RE = re.compile(r'"code"\s*:\s*(?:Number\()?(\d+)\)?')
@@ -455,87 +459,103 @@ def _reset_yaml_globals():
     upload_global_config.clear()
 
 
+def _parse_yaml_file(path):
+    """Parse a YAML file, reusing the previous result while the file is unchanged.
+
+    The scheduled jobs reload config.yaml on every run; the file rarely changes,
+    so the parse is keyed on (path, mtime, size) and only redone when one differs.
+    """
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    if _yaml_parse_cache.get("key") == key:
+        return _yaml_parse_cache["data"]
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=_YAML_LOADER)
+    _yaml_parse_cache["key"] = key
+    _yaml_parse_cache["data"] = data
+    return data
+
+
 def load_yaml_config():
     """加载 config.yaml 文件，解析按主播分组的配置结构并验证必要键"""
     global yaml_config, streamer_configs, upload_global_config
     try:
-        with open(config.YAML_CONFIG_PATH, 'r', encoding='utf-8') as f:
-            yaml_config = yaml.safe_load(f)
-            if not isinstance(yaml_config, dict):
-                logger.error(f"读取 {config.YAML_CONFIG_PATH} 失败: 文件内容不是有效的 YAML 字典格式。")
-                _reset_yaml_globals()
-                return False
-            logger.info(f"成功加载配置文件: {config.YAML_CONFIG_PATH}")
-
-            # --- 解析 streamers 配置 ---
-            streamers_raw = yaml_config.get('streamers')
-            if not isinstance(streamers_raw, dict) or not streamers_raw:
-                logger.error(f"配置文件 {config.YAML_CONFIG_PATH} 中缺少 'streamers' 或格式错误。")
-                _reset_yaml_globals()
-                return False
-
-            required_upload_keys = ['title', 'tid', 'tag', 'desc', 'source']
-            parsed_configs = {}
-            streamers_list = []
-            valid = True
-
-            for streamer_name, streamer_data in streamers_raw.items():
-                if not isinstance(streamer_data, dict):
-                    logger.error(f"主播 '{streamer_name}' 的配置格式错误，应为字典。")
-                    valid = False
-                    continue
+        yaml_config = _parse_yaml_file(config.YAML_CONFIG_PATH)
+        if not isinstance(yaml_config, dict):
+            logger.error(f"读取 {config.YAML_CONFIG_PATH} 失败: 文件内容不是有效的 YAML 字典格式。")
+            _reset_yaml_globals()
+            return False
+        logger.info(f"成功加载配置文件: {config.YAML_CONFIG_PATH}")
+
+        # --- 解析 streamers 配置 ---
+        streamers_raw = yaml_config.get('streamers')
+        if not isinstance(streamers_raw, dict) or not streamers_raw:
+            logger.error(f"配置文件 {config.YAML_CONFIG_PATH} 中缺少 'streamers' 或格式错误。")
+            _reset_yaml_globals()
+            return False
+
+        required_upload_keys = ['title', 'tid', 'tag', 'desc', 'source']
+        parsed_configs = {}
+        streamers_list = []
+        valid = True
+
+        for streamer_name, streamer_data in streamers_raw.items():
+            if not isinstance(streamer_data, dict):
+                logger.error(f"主播 '{streamer_name}' 的配置格式错误，应为字典。")
+                valid = False
+                continue
 
-                room_id = streamer_data.get('room_id')
-                if not room_id:
-                    logger.error(f"主播 '{streamer_name}' 缺少 'room_id'。")
-                    valid = False
-                    continue
+            room_id = streamer_data.get('room_id')
+            if not room_id:
+                logger.error(f"主播 '{streamer_name}' 缺少 'room_id'。")
+                valid = False
+                continue
 
-                upload_data = streamer_data.get('upload', {})
-                if not isinstance(upload_data, dict):
-                    logger.error(f"主播 '{streamer_name}' 的 'upload' 配置格式错误。")
-                    valid = False
-                    continue
+            upload_data = streamer_data.get('upload', {})
+            if not isinstance(upload_data, dict):
+                logger.error(f"主播 '{streamer_name}' 的 'upload' 配置格式错误。")
+                valid = False
+                continue
 
-                missing_keys = [k for k in required_upload_keys if k not in upload_data]
-                if missing_keys:
-                    logger.error(
-                        f"主播 '{streamer_name}' 的 upload 配置缺少以下必要字段: {', '.join(missing_keys)}"
-                    )
-                    valid = False
-                    continue
+            missing_keys = [k for k in required_upload_keys if k not in upload_data]
+            if missing_keys:
+                logger.error(
+                    f"主播 '{streamer_name}' 的 upload 配置缺少以下必要字段: {', '.join(missing_keys)}"
+                )
+                valid = False
+                continue
 
-                title = upload_data.get('title', '')
-                if '{time}' not in title:
-                    logger.warning(
-                        f"主播 '{streamer_name}' 的 'title' ('{title}') 不包含 '{{time}}' 占位符。将使用固定标题。"
-                    )
+            title = upload_data.get('title', '')
+            if '{time}' not in title:
+                logger.warning(
+                    f"主播 '{streamer_name}' 的 'title' ('{title}') 不包含 '{{time}}' 占位符。将使用固定标题。"
+                )
 
-                # 为上传元数据设置默认值
-                upload_data.setdefault('cover', '')
-                upload_data.setdefault('dynamic', '')
+            # 为上传元数据设置默认值
+            upload_data.setdefault('cover', '')
+            upload_data.setdefault('dynamic', '')
 
-                parsed_configs[streamer_name] = upload_data
-                streamers_list.append({"name": streamer_name, "room_id": str(room_id)})
+            parsed_configs[streamer_name] = upload_data
+            streamers_list.append({"name": streamer_name, "room_id": str(room_id)})
 
-            if not valid:
-                _reset_yaml_globals()
-                return False
+        if not valid:
+            _reset_yaml_globals()
+            return False
 
-            streamer_configs.clear()
-            streamer_configs.update(parsed_configs)
+        streamer_configs.clear()
+        streamer_configs.update(parsed_configs)
 
-            # 更新 config.STREAMERS 以便录制服务和状态监控使用
-            config.STREAMERS = streamers_list
+        # 更新 config.STREAMERS 以便录制服务和状态监控使用
+        config.STREAMERS = streamers_list
 
-            # --- 解析全局上传配置 ---
-            global_upload = yaml_config.get('upload', {})
-            upload_global_config.clear()
-            if isinstance(global_upload, dict):
-                upload_global_config.update(global_upload)
+        # --- 解析全局上传配置 ---
+        global_upload = yaml_config.get('upload', {})
+        upload_global_config.clear()
+        if isinstance(global_upload, dict):
+            upload_global_config.update(global_upload)
 
-            logger.info(f"已加载 {len(streamer_configs)} 个主播配置: {list(streamer_configs.keys())}")
-            return True
+        logger.info(f"已加载 {len(streamer_configs)} 个主播配置: {list(streamer_configs.keys())}")
+        return True
 
     except FileNotFoundError:
         logger.error(f"配置文件 {config.YAML_CONFIG_PATH} 未找到。请确保该文件存在。")
@@ -657,9 +677,8 @@ async def upload_to_bilibili(db: AsyncSession):
             file_name = os.path.basename(file_path)
             timestamp = get_timestamp_from_filename(file_path)
             try:
-                query = select(UploadedVideo).filter(UploadedVideo.first_part_filename == file_name)
-                result = await db.execute(query)
-                if result.scalars().first():
+                query = select(UploadedVideo.id).filter(UploadedVideo.first_part_filename == file_name)
+                if await db.scalar(query) is not None:
                     logger.info(f"文件 {file_name} 已有上传记录，跳过")
                 else:
                     video_info_list.append({'path': file_path, 'filename': file_name, 'timestamp': timestamp})
@@ -688,8 +707,7 @@ async def upload_to_bilibili(db: AsyncSession):
                 StreamSession.start_time.is_not(None),
                 StreamSession.end_time.is_(None)
             ).order_by(desc(StreamSession.start_time)).limit(1)
-            current_session_result = await db.execute(current_session_query)
-            current_session = current_session_result.scalars().first()
+            current_session = await db.scalar(current_session_query)
 
             all_sessions = list(complete_sessions)
             if current_session:
@@ -750,9 +768,8 @@ async def upload_to_bilibili(db: AsyncSession):
 
             videos.sort(key=lambda x: x['timestamp'])
 
-            session_query = select(StreamSession).filter(StreamSession.id == session_id)
-            session_result = await db.execute(session_query)
-            session = session_result.scalars().first()
+            # Already loaded above, so this is normally an identity-map hit
+            session = await db.get(StreamSession, session_id)
 
             logger.info(f"主播 [{streamer_name}] 开始处理直播场次 ID:{session_id} 的 {len(videos)} 个视频")
 
@@ -760,40 +777,33 @@ async def upload_to_bilibili(db: AsyncSession):
             period_end = (session.end_time or datetime.now()) + session_time_buffer
 
             # 查询该主播该场次的已有 BVID
-            query = select(UploadedVideo).filter(
+            query = select(UploadedVideo.bvid).filter(
                 UploadedVideo.streamer_name == streamer_name,
                 UploadedVideo.upload_time.between(period_start, period_end),
                 UploadedVideo.bvid.is_not(None)
             ).order_by(desc(UploadedVideo.upload_time)).limit(1)
-            result = await db.execute(query)
-            existing_record = result.scalars().first()
-
-            existing_bvid = None
-            if existing_record:
-                existing_bvid = existing_record.bvid
+            existing_bvid = await db.scalar(query)
+            if existing_bvid:
                 logger.info(f"该直播场次已有上传记录，BVID: {existing_bvid}")
 
             if not existing_bvid:
                 # 兼容旧记录（streamer_name 为 NULL），按时间范围回退查询
-                fallback_query = select(UploadedVideo).filter(
+                fallback_query = select(UploadedVideo.bvid).filter(
                     UploadedVideo.streamer_name.is_(None),
                     UploadedVideo.upload_time.between(period_start, period_end),
                     UploadedVideo.bvid.is_not(None)
                 ).order_by(desc(UploadedVideo.upload_time)).limit(1)
-                fallback_result = await db.execute(fallback_query)
-                fallback_record = fallback_result.scalars().first()
-                if fallback_record:
-                    existing_bvid = fallback_record.bvid
+                existing_bvid = await db.scalar(fallback_query)
+                if existing_bvid:
                     logger.info(f"从旧记录中找到 BVID: {existing_bvid}")
 
             if not existing_bvid:
-                pending_query = select(UploadedVideo).filter(
+                pending_query = select(UploadedVideo.id).filter(
                     UploadedVideo.upload_time.between(period_start, period_end),
                     UploadedVideo.bvid.is_(None),
                     or_(UploadedVideo.streamer_name == streamer_name, UploadedVideo.streamer_name.is_(None)),
-                ).order_by(desc(UploadedVideo.upload_time)).limit(1)
-                pending_result = await db.execute(pending_query)
-                if pending_result.scalars().first():
+                ).limit(1)
+                if await db.scalar(pending_query) is not None:
                     logger.info(
                         f"直播场次 ID:{session_id} 已存在待回填BVID的上传记录，"
                         "本次跳过创建新稿件，等待BVID回填后再追加分P"
@@ -817,9 +827,8 @@ async def upload_to_bilibili(db: AsyncSession):
                         file_path = video_info['path']
                         file_name = video_info['filename']
 
-                        recheck_query = select(UploadedVideo).filter(UploadedVideo.first_part_filename == file_name)
-                        recheck_result = await db.execute(recheck_query)
-                        if recheck_result.scalars().first():
+                        recheck_query = select(UploadedVideo.id).filter(UploadedVideo.first_part_filename == file_name)
+                        if await db.scalar(recheck_query) is not None:
                             logger.info(f"二次检查: 文件 {file_name} 已上传，跳过")
                             continue
 
@@ -952,7 +961,8 @@ async def upload_to_bilibili(db: AsyncSession):
                         )
                         db.add(new_upload)
                         await db.commit()
-                        await db.refresh(new_upload)
+                        # The flush already populated the primary key and the session
+                        # does not expire on commit, so no refresh SELECT is needed
                         record_id = new_upload.id
                         logger.info(f"已将视频信息记录到数据库 (ID: {record_id}, 标题: {title}, BVID: {acquired_bvid or '暂无'})")
                         _handle_uploaded_file_after_success(first_video_path, first_video_filename)
@@ -1067,47 +1077,53 @@ async def update_video_bvids(db: AsyncSession):
                 
             logger.info(f"从B站API获取到 {len(all_videos)} 条视频信息")
             
-            # 4. 根据标题匹配更新BVID
-            updated_count = 0
+            # 4. 根据标题匹配BVID，收集后一次性批量更新
+            pending = {}  # bvid -> record
             for record in no_bvid_records:
                 record_id = record.id
                 record_title = record.title
-                
+
                 if not record_id or not record_title:
                     continue
-                    
+
                 # 在B站视频中查找匹配的标题
-                found_bvid = None
-                for video_title, video_bvid in all_videos.items():
-                    if video_title == record_title and isinstance(video_bvid, str) and video_bvid.startswith('BV'):
-                        found_bvid = video_bvid
-                        break # 找到第一个匹配就跳出
-                
-                # 如果找到BVID，更新数据库
-                if found_bvid:
-                    try:
-                        # 检查该 BVID 是否已被其他记录使用
-                        bvid_query = select(UploadedVideo).filter(
-                            UploadedVideo.bvid == found_bvid,
-                            UploadedVideo.id != record_id
-                        )
-                        bvid_result = await db.execute(bvid_query)
-                        bvid_exists = bvid_result.scalars().first()
+                found_bvid = all_videos.get(record_title)
+                if not (isinstance(found_bvid, str) and found_bvid.startswith('BV')):
+                    continue
 
-                        if bvid_exists:
-                            logger.warning(f"尝试更新 BVID {found_bvid} 失败，因为它已被记录 ID:{bvid_exists.id} 使用")
-                            continue # 跳过此记录
+                if found_bvid in pending:
+                    logger.warning(f"尝试更新 BVID {found_bvid} 失败，因为它已被记录 ID:{pending[found_bvid].id} 使用")
+                    continue
+                pending[found_bvid] = record
 
-                        # 更新记录
-                        record.bvid = found_bvid
+            updated_count = 0
+            if pending:
+                try:
+                    # 一次查询检查这些 BVID 是否已被其他记录使用
+                    used_result = await db.execute(
+                        select(UploadedVideo.id, UploadedVideo.bvid).filter(UploadedVideo.bvid.in_(pending))
+                    )
+                    for other_id, used_bvid in used_result.all():
+                        pending.pop(used_bvid)
+                        logger.warning(f"尝试更新 BVID {used_bvid} 失败，因为它已被记录 ID:{other_id} 使用")
+
+                    if pending:
+                        # 按主键批量更新，一次 executemany 代替逐条 UPDATE
+                        await db.execute(
+                            update(UploadedVideo),
+                            [{"id": record.id, "bvid": bvid} for bvid, record in pending.items()]
+                        )
                         await db.commit()
-                        await db.refresh(record)
-                        logger.info(f"成功更新记录 ID:{record_id}, 标题:'{record_title}' 的BVID为 {found_bvid}")
-                        updated_count += 1
-                    except Exception as update_e:
-                         logger.error(f"更新记录 ID:{record_id} 的BVID ({found_bvid}) 时数据库出错: {update_e}")
-                         await db.rollback() # 出错时回滚
-            
+
+                        for bvid, record in pending.items():
+                            # 同步会话中已加载的对象，后续上传流程读到的是新 BVID
+                            set_committed_value(record, "bvid", bvid)
+                            logger.info(f"成功更新记录 ID:{record.id}, 标题:'{record.title}' 的BVID为 {bvid}")
+                        updated_count = len(pending)
+                except Exception as update_e:
+                    logger.error(f"批量更新BVID时数据库出错: {update_e}")
+                    await db.rollback() # 出错时回滚
+
             logger.info(f"BVID更新完成，共更新了 {updated_count}/{len(no_bvid_records)} 条记录")
             
         except Exception as e:
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from douyu2bilibili.models import Base
+
+
+@pytest.fixture
+async def session_local(tmp_path: Path):
+    """Session factory bound to a fresh SQLite database under tmp_path."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def api_client(session_local):
+    """HTTP client for the API app, backed by the session_local database."""
+    from douyu2bilibili import app as app_module
+
+    async def get_test_db():
+        async with session_local() as session:
+            yield session
+
+    caches = (
+        app_module._uploaded_cache,
+        app_module._latest_bvid_cache,
+        app_module._videos_without_bvid_cache,
+    )
+    for cache in caches:
+        cache.clear()
+    app_module.app.dependency_overrides[app_module.get_db] = get_test_db
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+    app_module.app.dependency_overrides.pop(app_module.get_db, None)
+    for cache in caches:
+        cache.clear()
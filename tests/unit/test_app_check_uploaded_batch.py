@@ -0,0 +1,73 @@
+import pytest
+
+from douyu2bilibili.models import UploadedVideo
+
+
+@pytest.mark.asyncio
+async def test_returns_status_per_filename(api_client, session_local):
+    async with session_local() as db:
+        db.add_all([
+            UploadedVideo(title="甲", first_part_filename="a.mp4", bvid="BV1"),
+            UploadedVideo(title="乙", first_part_filename="b.mp4"),
+        ])
+        await db.commit()
+
+    response = await api_client.post(
+        "/check_uploaded_batch", json=["a.mp4", "b.mp4", "c.mp4", "a.mp4"]
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "a.mp4": {"uploaded": True, "bvid": "BV1", "title": "甲"},
+        "b.mp4": {"uploaded": True, "bvid": None, "title": "乙"},
+        "c.mp4": {"uploaded": False},
+    }
+
+
+@pytest.mark.asyncio
+async def test_shares_cache_with_check_uploaded(api_client, session_local, monkeypatch):
+    from douyu2bilibili import app as app_module
+
+    monkeypatch.setattr(app_module._uploaded_cache, "ttl", 30)
+    assert (await api_client.get("/check_uploaded/a.mp4")).json() == {"uploaded": False}
+    # A row written behind the API's back stays hidden while the cached entry lives
+    async with session_local() as db:
+        db.add(UploadedVideo(title="甲", first_part_filename="a.mp4", bvid="BV1"))
+        await db.commit()
+
+    response = await api_client.post("/check_uploaded_batch", json=["a.mp4"])
+
+    assert response.json() == {"a.mp4": {"uploaded": False}}
+    assert app_module._uploaded_cache.get("a.mp4") == {"uploaded": False}
+
+
+@pytest.mark.asyncio
+async def test_empty_list(api_client):
+    response = await api_client.post("/check_uploaded_batch", json=[])
+
+    assert response.status_code == 200
+    assert response.json() == {}
+
+
+@pytest.mark.asyncio
+async def test_rejects_oversized_batch(api_client):
+    from douyu2bilibili import app as app_module
+
+    filenames = [f"{i}.mp4" for i in range(app_module._CHECK_UPLOADED_BATCH_MAX + 1)]
+
+    response = await api_client.post("/check_uploaded_batch", json=filenames)
+
+    assert response.status_code == 422
+    assert app_module._uploaded_cache.get("0.mp4") is None
+
+
+@pytest.mark.asyncio
+async def test_accepts_full_batch(api_client):
+    from douyu2bilibili import app as app_module
+
+    filenames = [f"{i}.mp4" for i in range(app_module._CHECK_UPLOADED_BATCH_MAX)]
+
+    response = await api_client.post("/check_uploaded_batch", json=filenames)
+
+    assert response.status_code == 200
+    assert len(response.json()) == app_module._CHECK_UPLOADED_BATCH_MAX
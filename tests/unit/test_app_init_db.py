@@ -0,0 +1,61 @@
+"""Tests for the startup schema check in init_db."""
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from douyu2bilibili.models import Base
+
+
+def _record_statements(engine) -> list[str]:
+    statements: list[str] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_init_db_is_a_single_query_on_an_up_to_date_schema(tmp_path: Path, monkeypatch):
+    from douyu2bilibili import app as app_module
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(app_module, "engine", engine)
+
+    await app_module.init_db()
+    statements = _record_statements(engine)
+    await app_module.init_db()
+    await engine.dispose()
+
+    assert len(statements) == 1
+    assert "sqlite_master" in statements[0]
+
+
+@pytest.mark.asyncio
+async def test_init_db_migrates_legacy_schema(tmp_path: Path, monkeypatch):
+    from douyu2bilibili import app as app_module
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(app_module, "engine", engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # Table as created before the streamer_name column existed
+        await conn.execute(text("DROP TABLE uploaded_videos"))
+        await conn.execute(text(
+            "CREATE TABLE uploaded_videos (id INTEGER PRIMARY KEY, bvid VARCHAR, title VARCHAR NOT NULL, "
+            "first_part_filename VARCHAR NOT NULL, upload_time DATETIME, created_at DATETIME)"
+        ))
+
+    await app_module.init_db()
+
+    async with engine.connect() as conn:
+        columns = {row[1] for row in await conn.execute(text("PRAGMA table_info(uploaded_videos)"))}
+        indexes = set(await conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'index'")))
+    await engine.dispose()
+
+    model_indexes = {index.name for table in Base.metadata.sorted_tables for index in table.indexes}
+    assert "streamer_name" in columns
+    assert model_indexes <= indexes
@@ -0,0 +1,45 @@
+"""Tests for the live-status check behind the manual trigger endpoints."""
+import pytest
+
+
+class _FakeMonitor:
+    def __init__(self, cached, fresh):
+        self._cached = cached
+        self._fresh = fresh
+        self.api_calls = 0
+
+    def is_live(self):
+        return self._cached
+
+    async def check_is_streaming(self):
+        self.api_calls += 1
+        return self._fresh
+
+
+@pytest.mark.asyncio
+async def test_scheduler_worker_uses_cached_status(monkeypatch):
+    from douyu2bilibili import app as app_module
+
+    monitors = {"a": _FakeMonitor(cached=True, fresh=False), "b": _FakeMonitor(cached=False, fresh=True)}
+    monkeypatch.setattr(app_module, "stream_monitors", monitors)
+    monkeypatch.setattr(app_module, "_scheduler_lock_file", object())
+
+    assert await app_module._live_streamer_names() == ["a"]
+    assert [m.api_calls for m in monitors.values()] == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_other_workers_refresh_status_per_call(monkeypatch):
+    from douyu2bilibili import app as app_module
+
+    # Cached values are stale: only the scheduler worker's status job updates them
+    monitors = {
+        "ended": _FakeMonitor(cached=True, fresh=False),
+        "started": _FakeMonitor(cached=False, fresh=True),
+        "api_error": _FakeMonitor(cached=True, fresh=None),
+    }
+    monkeypatch.setattr(app_module, "stream_monitors", monitors)
+    monkeypatch.setattr(app_module, "_scheduler_lock_file", None)
+
+    assert await app_module._live_streamer_names() == ["started", "api_error"]
+    assert [m.api_calls for m in monitors.values()] == [1, 1, 1]
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import select
+
+from douyu2bilibili.models import UploadedVideo
+
+FILENAME = "洞主录播2024-01-02T12_00_00.mp4"
+
+
+async def _record(client, **params):
+    return await client.post("/record_upload", params={"title": "标题", **params})
+
+
+@pytest.mark.asyncio
+async def test_inserts_new_record(api_client, session_local):
+    response = await _record(api_client, first_part_filename=FILENAME, bvid="BV1")
+
+    assert response.status_code == 200
+    assert response.json()["bvid"] == "BV1"
+    assert response.json()["upload_time"] == "2024-01-02T12:00:00"
+    async with session_local() as db:
+        assert (await db.scalars(select(UploadedVideo.bvid))).all() == ["BV1"]
+
+
+@pytest.mark.asyncio
+async def test_attaches_bvid_to_record_without_one(api_client, session_local):
+    first = await _record(api_client, first_part_filename=FILENAME)
+    second = await _record(api_client, first_part_filename=FILENAME, bvid="BV1")
+
+    assert second.status_code == 200
+    assert second.json()["id"] == first.json()["id"]
+    assert second.json()["bvid"] == "BV1"
+    async with session_local() as db:
+        assert (await db.scalars(select(UploadedVideo.bvid))).all() == ["BV1"]
+
+
+@pytest.mark.asyncio
+async def test_rejects_existing_file(api_client, session_local):
+    await _record(api_client, first_part_filename=FILENAME, bvid="BV1")
+
+    for bvid in (None, "BV2"):
+        params = {"first_part_filename": FILENAME}
+        if bvid:
+            params["bvid"] = bvid
+        response = await _record(api_client, **params)
+        assert response.status_code == 400
+        assert "已存在记录" in response.json()["detail"]
+
+    async with session_local() as db:
+        assert (await db.scalars(select(UploadedVideo.bvid))).all() == ["BV1"]
+
+
+@pytest.mark.asyncio
+async def test_rejects_existing_bvid(api_client, session_local):
+    await _record(api_client, first_part_filename=FILENAME, bvid="BV1")
+
+    response = await _record(api_client, first_part_filename="other.mp4", bvid="BV1")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "视频 BVID BV1 已存在"
+    async with session_local() as db:
+        assert (await db.scalars(select(UploadedVideo.first_part_filename))).all() == [FILENAME]
+
+
+@pytest.mark.asyncio
+async def test_invalidates_cached_status(api_client):
+    assert (await api_client.get(f"/check_uploaded/{FILENAME}")).json() == {"uploaded": False}
+
+    await _record(api_client, first_part_filename=FILENAME, bvid="BV1")
+
+    assert (await api_client.get(f"/check_uploaded/{FILENAME}")).json() == {
+        "uploaded": True, "bvid": "BV1", "title": "标题",
+    }
@@ -0,0 +1,53 @@
+"""Tests for /videos_without_bvid."""
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import text
+
+from douyu2bilibili.models import UploadedVideo
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("params", [{"limit": -1}, {"limit": 0}, {"limit": 1001}, {"offset": -1}])
+async def test_rejects_out_of_range_paging(params):
+    from douyu2bilibili.app import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/videos_without_bvid", params=params)
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query_name", ["_VIDEOS_WITHOUT_BVID_QUERY", "_VIDEOS_WITHOUT_BVID_PAGE_QUERY"])
+async def test_query_reads_rows_in_index_order(session_local, query_name):
+    from douyu2bilibili import app as app_module
+
+    query = getattr(app_module, query_name)
+    async with session_local() as db:
+        # No ANALYZE: the app never gathers statistics
+        rows = await db.execute(
+            text("EXPLAIN QUERY PLAN " + query.element.text), {"limit": 200, "offset": 0}
+        )
+        plan = [row[-1] for row in rows]
+
+    assert plan == ["SEARCH uploaded_videos USING INDEX ix_uploaded_videos_bvid_upload_time (bvid=?)"]
+
+
+@pytest.mark.asyncio
+async def test_returns_newest_videos_without_bvid_first(api_client, session_local):
+    async with session_local() as db:
+        db.add_all([
+            UploadedVideo(title="old", first_part_filename="old.mp4", upload_time=datetime(2024, 1, 1)),
+            UploadedVideo(title="new", first_part_filename="new.mp4", upload_time=datetime(2024, 1, 3)),
+            UploadedVideo(title="done", first_part_filename="done.mp4", bvid="BV1",
+                          upload_time=datetime(2024, 1, 2)),
+        ])
+        await db.commit()
+
+    response = await api_client.get("/videos_without_bvid", params={"limit": 1, "offset": 1})
+
+    assert response.status_code == 200
+    assert [(v["title"], v["upload_time"]) for v in response.json()] == [("old", "2024-01-01T00:00:00")]
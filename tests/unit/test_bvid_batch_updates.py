@@ -0,0 +1,134 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, text
+
+from douyu2bilibili.models import UploadedVideo
+
+
+async def _add_videos(session_local, *videos):
+    async with session_local() as db:
+        db.add_all(videos)
+        await db.commit()
+        return [video.id for video in videos]
+
+
+async def _bvids(session_local):
+    async with session_local() as db:
+        result = await db.execute(select(UploadedVideo.id, UploadedVideo.bvid))
+        return dict(result.all())
+
+
+def _video(name, bvid=None, upload_time=None):
+    return UploadedVideo(
+        title=name, first_part_filename=f"{name}.mp4", bvid=bvid, upload_time=upload_time
+    )
+
+
+@pytest.fixture
+def fake_bilibili(monkeypatch):
+    """Point uploader.update_video_bvids at a fake feed; returns its title -> BVID map."""
+    from douyu2bilibili import uploader
+    from douyu2bilibili import config as config_module
+
+    feed = {}
+
+    class FakeLoginController:
+        def check_bilibili_login(self):
+            return True
+
+    class FakeFeedController:
+        def get_video_dict_info(self, size, status_type):
+            return dict(feed) if status_type == "pubed" else {}
+
+    monkeypatch.setattr(config_module, "BILIBILI_UPLOADER_BACKEND", "bilitool")
+    monkeypatch.setattr(uploader, "LoginController", FakeLoginController)
+    monkeypatch.setattr(uploader, "FeedController", FakeFeedController)
+    return feed
+
+
+@pytest.mark.asyncio
+async def test_update_video_bvids_skips_taken_bvids(session_local, fake_bilibili):
+    from douyu2bilibili import uploader
+
+    a, b, c = await _add_videos(session_local, _video("a"), _video("b"), _video("c", bvid="BV3"))
+    fake_bilibili.update({"a": "BV1", "b": "BV3"})
+
+    async with session_local() as db:
+        await uploader.update_video_bvids(db)
+
+    assert await _bvids(session_local) == {a: "BV1", b: None, c: "BV3"}
+
+
+@pytest.mark.asyncio
+async def test_update_video_bvids_is_all_or_nothing(session_local, fake_bilibili):
+    from douyu2bilibili import uploader
+
+    # Newest first, so "a" is written before the failing "b"
+    a, b = await _add_videos(
+        session_local,
+        _video("a", upload_time=datetime(2024, 1, 2)),
+        _video("b", upload_time=datetime(2024, 1, 1)),
+    )
+    fake_bilibili.update({"a": "BV1", "b": "BV2"})
+    async with session_local() as db:
+        await db.execute(text(
+            "CREATE TRIGGER fail_b BEFORE UPDATE OF bvid ON uploaded_videos "
+            f"WHEN NEW.id = {b} BEGIN SELECT RAISE(ABORT, 'boom'); END"
+        ))
+        await db.commit()
+
+    async with session_local() as db:
+        await uploader.update_video_bvids(db)
+
+    assert await _bvids(session_local) == {a: None, b: None}
+
+
+@pytest.mark.asyncio
+async def test_bulk_endpoint_updates_all_records(api_client, session_local):
+    a, b = await _add_videos(session_local, _video("a"), _video("b"))
+
+    response = await api_client.put(
+        "/update_video_bvids_bulk", json=[{"id": a, "bvid": "BV1"}, {"id": b, "bvid": "BV2"}]
+    )
+
+    assert response.status_code == 200
+    assert sorted((v["id"], v["bvid"]) for v in response.json()) == [(a, "BV1"), (b, "BV2")]
+    assert await _bvids(session_local) == {a: "BV1", b: "BV2"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "updates",
+    [
+        [{"id": "a", "bvid": "BV1"}, {"id": "b", "bvid": "BV1"}],  # duplicate BVID
+        [{"id": "a", "bvid": "BV1"}, {"id": "a", "bvid": "BV2"}],  # duplicate id
+        [{"id": "a", "bvid": "BV1"}, {"id": "b", "bvid": "BV3"}],  # held by another record
+        [{"id": "a", "bvid": "XX1"}],  # invalid format
+    ],
+)
+async def test_bulk_endpoint_rejects_invalid_batches(api_client, session_local, updates):
+    ids = dict(zip("abc", await _add_videos(
+        session_local, _video("a"), _video("b"), _video("c", bvid="BV3")
+    )))
+    before = await _bvids(session_local)
+
+    response = await api_client.put(
+        "/update_video_bvids_bulk", json=[{**u, "id": ids[u["id"]]} for u in updates]
+    )
+
+    assert response.status_code == 400
+    assert await _bvids(session_local) == before
+
+
+@pytest.mark.asyncio
+async def test_bulk_endpoint_reports_missing_ids(api_client, session_local):
+    (a,) = await _add_videos(session_local, _video("a"))
+
+    response = await api_client.put(
+        "/update_video_bvids_bulk", json=[{"id": a, "bvid": "BV1"}, {"id": a + 100, "bvid": "BV2"}]
+    )
+
+    assert response.status_code == 404
+    assert str(a + 100) in response.json()["detail"]
+    assert await _bvids(session_local) == {a: None}
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from douyu2bilibili.models import Base, StreamSession
+
+
+@pytest.mark.asyncio
+async def test_clean_stale_sessions_closes_only_stale_open_sessions(tmp_path: Path, monkeypatch):
+    from douyu2bilibili import scheduler as scheduler_module
+
+    db_path = tmp_path / "test.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_local = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    now = datetime(2024, 1, 10, 12, 0, 0)
+    stale_start = datetime(2024, 1, 2, 8, 30, 15, 123456)
+    closed_end = datetime(2024, 1, 2, 10, 0, 0)
+    async with session_local() as db:
+        db.add_all([
+            StreamSession(streamer_name="stale", start_time=stale_start),
+            StreamSession(streamer_name="closed", start_time=stale_start, end_time=closed_end),
+            StreamSession(streamer_name="recent", start_time=now - timedelta(hours=2)),
+        ])
+        await db.commit()
+
+    monkeypatch.setattr(scheduler_module, "_get_app_deps", lambda: (session_local, None, {}))
+    monkeypatch.setattr(scheduler_module, "local_now", lambda: now)
+
+    await scheduler_module.clean_stale_sessions()
+
+    async with session_local() as db:
+        end_times = dict((await db.execute(
+            select(StreamSession.streamer_name, StreamSession.end_time)
+        )).all())
+        raw_end_time = await db.scalar(
+            text("SELECT end_time FROM stream_sessions WHERE streamer_name = 'stale'")
+        )
+    await engine.dispose()
+
+    assert end_times == {
+        "stale": stale_start + timedelta(hours=12),
+        "closed": closed_end,
+        "recent": None,
+    }
+    # Same text format as ORM-written datetimes, fractional seconds included
+    assert raw_end_time == "2024-01-02 20:30:15.123456"
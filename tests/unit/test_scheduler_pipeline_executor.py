@@ -0,0 +1,16 @@
+"""Tests for the processing pipeline executor's lifecycle."""
+
+
+def test_pipeline_executor_is_recreated_after_shutdown():
+    from douyu2bilibili import scheduler as scheduler_module
+
+    first = scheduler_module.get_pipeline_executor()
+    assert scheduler_module.get_pipeline_executor() is first
+
+    # App shutdown releases the executor; a later lifespan must still be able to queue runs
+    scheduler_module.shutdown_pipeline_executor()
+    second = scheduler_module.get_pipeline_executor()
+
+    assert second is not first
+    assert second.submit(lambda: 42).result(timeout=5) == 42
+    scheduler_module.shutdown_pipeline_executor()
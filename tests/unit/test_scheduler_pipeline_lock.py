@@ -0,0 +1,32 @@
+"""Tests for cross-process serialisation of the processing pipeline."""
+import fcntl
+
+
+def test_processing_run_holds_pipeline_lock(monkeypatch, tmp_path):
+    from douyu2bilibili import config as config_module
+    from douyu2bilibili import scheduler as scheduler_module
+
+    lock_path = tmp_path / "pipeline.lock"
+    monkeypatch.setattr(scheduler_module, "_PIPELINE_LOCK_PATH", str(lock_path))
+    monkeypatch.setattr(config_module, "SKIP_VIDEO_ENCODING", False)
+
+    observed = []
+
+    def lock_is_held():
+        # A separate open file description behaves like another worker process
+        with open(lock_path, "w") as other:
+            try:
+                fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(other, fcntl.LOCK_UN)
+            return False
+
+    monkeypatch.setattr(scheduler_module, "cleanup_small_files", lambda: observed.append(lock_is_held()))
+    monkeypatch.setattr(scheduler_module, "convert_danmaku", lambda: observed.append(lock_is_held()))
+    monkeypatch.setattr(scheduler_module, "encode_video", lambda: observed.append(lock_is_held()))
+
+    scheduler_module.run_processing_sync()
+
+    assert observed == [True, True, True]
+    assert lock_is_held() is False
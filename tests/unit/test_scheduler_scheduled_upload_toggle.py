@@ -73,12 +73,13 @@ async def test_scheduled_upload_skips_when_disabled(monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_scheduled_video_processing_runs_independently(monkeypatch):
+async def test_scheduled_video_processing_runs_independently(monkeypatch, tmp_path):
     from douyu2bilibili import config as config_module
     from douyu2bilibili import scheduler as scheduler_module
 
     events = []
 
+    monkeypatch.setattr(scheduler_module, "_PIPELINE_LOCK_PATH", str(tmp_path / "pipeline.lock"))
     monkeypatch.setattr(scheduler_module.asyncio, "get_running_loop", lambda: _FakeLoop())
     monkeypatch.setattr(
         scheduler_module,
@@ -119,8 +120,14 @@ async def test_manual_upload_task_still_runs_when_scheduled_upload_disabled(monk
     monkeypatch.setattr(scheduler_module, "update_video_bvids", fake_update_video_bvids)
     monkeypatch.setattr(scheduler_module, "upload_to_bilibili", fake_upload_to_bilibili)
 
-    fake_db = object()
-    await scheduler_module.run_upload_async(fake_db)
+    fake_db = _FakeDbSession()
+    monkeypatch.setattr(
+        scheduler_module,
+        "_get_app_deps",
+        lambda: (_FakeSessionFactory(fake_db), None, {}),
+    )
+
+    await scheduler_module.run_upload_async()
 
     assert events == [("update_bvids", fake_db), ("upload", fake_db)]
 
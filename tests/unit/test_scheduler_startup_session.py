@@ -11,22 +11,6 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime, timedelta
 
 
-class _FakeScalarsResult:
-    def __init__(self, value):
-        self._value = value
-
-    def first(self):
-        return self._value
-
-
-class _FakeExecuteResult:
-    def __init__(self, value):
-        self._value = value
-
-    def scalars(self):
-        return _FakeScalarsResult(self._value)
-
-
 class _FakeDbSession:
     def __init__(self, existing_session=None):
         self._existing = existing_session
@@ -34,8 +18,8 @@ class _FakeDbSession:
         self.committed = False
         self.rolled_back = False
 
-    async def execute(self, _query):
-        return _FakeExecuteResult(self._existing)
+    async def scalar(self, _query):
+        return self._existing
 
     def add(self, obj):
         self.added.append(obj)
@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_stream_status_check_covers_every_streamer(monkeypatch):
+    from douyu2bilibili import scheduler as scheduler_module
+
+    checked = []
+
+    monkeypatch.setattr(
+        scheduler_module,
+        "_get_app_deps",
+        lambda: (None, None, {"alice": object(), "bob": object(), "carol": object()}),
+    )
+
+    async def fake_log_stream_end(streamer_name):
+        checked.append(streamer_name)
+        if streamer_name == "alice":
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(scheduler_module, "scheduled_log_stream_end", fake_log_stream_end)
+
+    await scheduler_module.scheduled_stream_status_check()
+
+    # A failing streamer must not prevent the others from being checked
+    assert sorted(checked) == ["alice", "bob", "carol"]
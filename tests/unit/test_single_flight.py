@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from douyu2bilibili.cache import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_in_flight_call():
+    flights = SingleFlight()
+    calls = []
+    release = asyncio.Event()
+
+    async def lookup():
+        calls.append("lookup")
+        await release.wait()
+        return {"uploaded": True}
+
+    waiters = [asyncio.create_task(flights.do("a.flv", lookup)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == [{"uploaded": True}] * 3
+    assert calls == ["lookup"]
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_waiter_and_is_not_kept():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("db down")
+
+    waiters = [asyncio.create_task(flights.do("a.flv", failing)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok():
+        return 1
+
+    # The failed call is forgotten; the next call runs again
+    assert await flights.do("a.flv", ok) == 1
+
+
+@pytest.mark.asyncio
+async def test_waiter_retries_when_the_leader_is_cancelled():
+    flights = SingleFlight()
+    calls = []
+    release = asyncio.Event()
+
+    async def lookup():
+        calls.append("lookup")
+        await release.wait()
+        return {"uploaded": True}
+
+    leader = asyncio.create_task(flights.do("a.flv", lookup))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("a.flv", lookup))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == {"uploaded": True}
+    assert leader.cancelled()
+    assert calls == ["lookup", "lookup"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_the_call():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def lookup():
+        await release.wait()
+        return 1
+
+    leader = asyncio.create_task(flights.do("a.flv", lookup))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("a.flv", lookup))
+    await asyncio.sleep(0)
+
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+    release.set()
+
+    assert await leader == 1
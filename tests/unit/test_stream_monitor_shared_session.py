@@ -0,0 +1,35 @@
+import pytest
+
+
+class _FakeResponse:
+    status = 200
+
+    async def json(self):
+        return {"room": {"show_status": 1, "videoLoop": 0}}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class _FakeHttpSession:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **_kwargs):
+        self.urls.append(url)
+        return _FakeResponse()
+
+
+@pytest.mark.asyncio
+async def test_check_is_streaming_reuses_shared_session():
+    from douyu2bilibili.stream_monitor import StreamStatusMonitor
+
+    http_session = _FakeHttpSession()
+    monitor = StreamStatusMonitor("12345", "alice", session=http_session)
+
+    assert await monitor.check_is_streaming() is True
+    assert await monitor.check_is_streaming() is True
+    assert http_session.urls == ["https://www.douyu.com/betard/12345"] * 2
@@ -0,0 +1,57 @@
+from douyu2bilibili.cache import TTLCache
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_returns_value_until_expired():
+    clock = _FakeClock()
+    cache = TTLCache(maxsize=10, ttl=30, clock=clock)
+
+    cache.set("a.flv", {"uploaded": True})
+    clock.now = 29.9
+    assert cache.get("a.flv") == {"uploaded": True}
+
+    clock.now = 30.0
+    assert cache.get("a.flv") is None
+    assert len(cache) == 0
+
+
+def test_evicts_least_recently_used_when_full():
+    cache = TTLCache(maxsize=2, ttl=30, clock=_FakeClock())
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_pop_and_clear_invalidate_entries():
+    cache = TTLCache(maxsize=10, ttl=30, clock=_FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.pop("a")
+    cache.pop("missing")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_non_positive_ttl_disables_cache():
+    cache = TTLCache(maxsize=10, ttl=0, clock=_FakeClock())
+
+    cache.set("a.flv", {"uploaded": False})
+    assert cache.get("a.flv") is None
+    assert len(cache) == 0
@@ -160,3 +160,42 @@ upload:
 
     assert result is True
     assert "{danmaku_tag}" in uploader.streamer_configs["洞主"]["title"]
+
+
+def test_load_yaml_config_reparses_only_when_file_changes(tmp_path: Path, monkeypatch):
+    from douyu2bilibili import uploader
+
+    yaml_template = """\
+streamers:
+  洞主:
+    room_id: "{room_id}"
+    upload:
+      title: "洞主直播录像{{time}}"
+      tid: 171
+      tag: "洞主,直播录像"
+      desc: "测试简介"
+      source: "https://www.douyu.com/138243"
+"""
+    yaml_file = tmp_path / "config.yaml"
+    yaml_file.write_text(yaml_template.format(room_id="138243"), encoding="utf-8")
+    monkeypatch.setattr(config_module, "YAML_CONFIG_PATH", str(yaml_file))
+
+    assert uploader.load_yaml_config() is True
+
+    real_load = uploader.yaml.load
+    parses = []
+
+    def counting_load(*args, **kwargs):
+        parses.append(1)
+        return real_load(*args, **kwargs)
+
+    monkeypatch.setattr(uploader.yaml, "load", counting_load)
+
+    assert uploader.load_yaml_config() is True
+    assert parses == []
+
+    yaml_file.write_text(yaml_template.format(room_id="1382430"), encoding="utf-8")
+
+    assert uploader.load_yaml_config() is True
+    assert parses == [1]
+    assert config_module.STREAMERS == [{"name": "洞主", "room_id": "1382430"}]